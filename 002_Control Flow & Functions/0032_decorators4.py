@@ -0,0 +1,227 @@
+"""
+# Logging Decorator: Level Gating, Lazy Formatting & a Buffered Background Sink
+
+# The log_decorator(level) in 0030_decorators2.py does three expensive things on EVERY call:
+# 1. It ignores the level: a "DEBUG" message is printed even when nobody wants DEBUG output.
+# 2. It builds the f-string eagerly, even if the message is thrown away later.
+# 3. It calls print(), which is a separate (slow) write to the terminal per message.
+
+# This file fixes each of them:
+# 1. A global threshold checked at DECORATION time: below the threshold, the decorator returns
+#    the original function, so there is no wrapper and no cost at all.
+# 2. Records are stored as (template, args) and only formatted with % when they are written.
+# 3. Records are appended to an in-memory buffer; a background thread wakes up periodically,
+#    formats the whole batch and writes it with ONE large write() call.
+"""
+
+import atexit
+import collections
+import functools
+import io
+import sys
+import threading
+import time
+
+# Step 1: Levels and the global threshold
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+_threshold = LEVELS["INFO"]
+
+
+def set_level(level):
+    """Set the global threshold. Affects functions decorated AFTER this call."""
+    global _threshold
+    _threshold = LEVELS[level]
+
+
+def is_enabled_for(level):
+    return LEVELS[level] >= _threshold
+
+
+# Step 2: The buffered sink
+# collections.deque.append() and popleft() are thread-safe, so callers never take a lock.
+# The writer thread is a daemon thread: it does not keep the program alive on exit;
+# atexit makes sure whatever is still buffered gets written.
+# Limits, so a burst of logging cannot eat all memory or stall the writer:
+# - at most max_buffer records wait in the buffer; beyond that new records are dropped and
+#   counted in 'dropped' (reported in the output with the next batch);
+# - one flush() writes at most max_batch records, so it holds write_lock for a bounded time.
+# After close() there is no writer thread any more, so emit() writes the record itself.
+
+
+class BufferedSink:
+    def __init__(self, stream=None, flush_interval=0.05, max_batch=10_000, max_buffer=100_000):
+        self.stream = stream if stream is not None else sys.stdout
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_buffer = max_buffer
+        self.buffer = collections.deque()
+        self.dropped = 0  # may undercount slightly when several threads drop at once
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.write_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def emit(self, level, template, args):
+        """Queue one record. Called on the hot path: just an append."""
+        if self.stopped:
+            with self.write_lock:
+                self._write([(level, template, args)])
+            return
+        buffered = len(self.buffer)
+        if buffered >= self.max_buffer:
+            self.dropped += 1
+            return
+        self.buffer.append((level, template, args))
+        if buffered + 1 >= self.max_batch:
+            self.wakeup.set()  # a full batch is waiting: don't wait for flush_interval
+
+    def _run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+            if len(self.buffer) >= self.max_batch:
+                self.wakeup.set()  # more than one batch was waiting: go again right away
+
+    def flush(self):
+        """Format up to max_batch buffered records and write them with a single write() call."""
+        with self.write_lock:
+            popleft = self.buffer.popleft
+            # len() is read once: records appended meanwhile wait for the next flush
+            records = [popleft() for _ in range(min(len(self.buffer), self.max_batch))]
+            self._write(records)
+
+    def _write(self, records):
+        # Lazy formatting: the % operator runs here, off the caller's thread.
+        lines = [f"[{level}] " + (template % args if args else template)
+                 for level, template, args in records]
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            lines.append(f"[WARNING] log buffer full: {dropped} records dropped")
+        if lines:
+            lines.append("")  # trailing newline after the last line
+            self.stream.write("\n".join(lines))
+            self.stream.flush()
+
+    def close(self):
+        if not self.stopped:
+            self.stopped = True
+            self.wakeup.set()
+            self.thread.join()
+            while self.buffer:
+                self.flush()
+
+
+sink = BufferedSink()
+
+
+# Step 3: The 3-layer decorator factory (same shape as 0030_decorators2.py)
+def log_decorator(level):
+    level_no = LEVELS[level]  # fail fast on an unknown level name
+
+    def actual_decorator(func):
+        # Below the threshold: hand back the bare function -> zero wrapper cost.
+        if level_no < _threshold:
+            return func
+
+        name = func.__name__  # read once, not on every call
+        emit = sink.emit
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # The message is NOT formatted here; only the template and its arguments are queued.
+            emit(level, "Running function: %s", (name,))
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return actual_decorator
+
+
+# Step 4: Benchmark
+# Measure the per-call overhead for: no decorator, a decorator below the threshold (disabled),
+# and a decorator at/above the threshold (enabled). Output goes to an in-memory stream so we
+# measure the logging path, not the terminal.
+def benchmark(calls=200_000):
+    global sink, _threshold
+    real_sink, sink = sink, BufferedSink(stream=io.StringIO())
+    saved_threshold = _threshold
+    try:
+        set_level("INFO")
+
+        def add(x, y):
+            return x + y
+
+        candidates = {
+            "bare function": add,
+            "disabled (DEBUG < INFO)": log_decorator("DEBUG")(add),
+            "enabled (ERROR >= INFO)": log_decorator("ERROR")(add),
+        }
+        results = {}
+        for label, target in candidates.items():
+            start = time.perf_counter_ns()
+            for i in range(calls):
+                target(i, 1)
+            results[label] = (time.perf_counter_ns() - start) / calls
+        return results
+    finally:
+        # Restore the globals even if a call above raised
+        sink.close()
+        sink = real_sink
+        _threshold = saved_threshold
+
+
+if __name__ == "__main__":
+    set_level("DEBUG")
+
+    @log_decorator("DEBUG")
+    def add(x, y):
+        return x + y
+
+    @log_decorator("ERROR")
+    def divide(x, y):
+        return x / y
+
+    print(add(2, 3))  # 5
+    print(divide(10, 2))  # 5.0
+    sink.flush()  # the background thread would do this within flush_interval anyway
+    # Output:
+    # 5
+    # 5.0
+    # [DEBUG] Running function: add
+    # [ERROR] Running function: divide
+
+    set_level("ERROR")
+
+    @log_decorator("DEBUG")
+    def multiply(x, y):
+        return x * y
+
+    print(multiply.__name__, "is wrapped:", hasattr(multiply, "__wrapped__"))
+    # multiply is wrapped: False   -> the bare function, no wrapper at all
+
+    # The limits: a buffer of 3 records, a 4th and 5th are dropped and counted; after
+    # close() a record is written straight away instead of being lost.
+    small = BufferedSink(stream=io.StringIO(), flush_interval=60, max_buffer=3)
+    for i in range(5):
+        small.emit("INFO", "record %d", (i,))
+    small.close()
+    small.emit("INFO", "after close", ())
+    print(small.stream.getvalue(), end="")
+    # [INFO] record 0
+    # [INFO] record 1
+    # [INFO] record 2
+    # [WARNING] log buffer full: 2 records dropped
+    # [INFO] after close
+
+    for label, ns in benchmark().items():
+        print(f"{label:<26}{ns:>8.0f} ns/call")
+    # Output (numbers vary):
+    # bare function                   77 ns/call
+    # disabled (DEBUG < INFO)         74 ns/call
+    # enabled (ERROR >= INFO)       1399 ns/call
+    # Enabled calls cost ~1.4-1.6 us here: the extra Python frame of the wrapper, the *args
+    # packing and the append. The disabled decorator costs nothing, as it is not there.
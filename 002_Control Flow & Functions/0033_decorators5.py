@@ -0,0 +1,290 @@
+"""
+# Memoization Decorator: LRU, TTL, Byte-Size Limits, Statistics & a Disk Tier
+
+# A "pure" function always returns the same result for the same arguments and has no side
+# effects, e.g. factorial(n) in 0011_functions.py or power(base, exponent) in 0013_functions3.py.
+# If we call it again with the same arguments, we can return the remembered result instead of
+# computing it again. This is called memoization (caching).
+
+# functools.lru_cache does the basics. This decorator adds what lru_cache cannot do:
+# - ttl:        entries expire after 'ttl' seconds (good for data that goes stale).
+# - max_bytes:  limit the total (approximate) size of cached results, not just their number.
+# - disk_path:  an optional second tier on disk (shelve) that survives process restarts.
+# - statistics: hits, misses, evictions, expirations and disk hits.
+# - thread_safe: protect the cache with a lock when it is shared between threads.
+"""
+
+import collections
+import functools
+import hashlib
+import pickle
+import shelve
+import sys
+import threading
+import time
+
+
+# Step 1: Building a cache key from the arguments
+# The arguments must be hashable, exactly as with dict keys.
+# kwargs are sorted so that f(a=1, b=2) and f(b=2, a=1) share one entry.
+# typed=True keeps f(3) and f(3.0) apart (3 == 3.0 and hash(3) == hash(3.0)!).
+class _KwargsMark:
+    """Separates args from kwargs in a key. Unlike a bare object(), its repr() contains no
+    memory address, so keys print the same in every process."""
+
+    def __repr__(self):
+        return "<kwargs>"
+
+
+_KWARGS_MARK = _KwargsMark()
+
+
+def make_key(args, kwargs, typed):
+    key = args
+    if kwargs:
+        key += (_KWARGS_MARK,) + tuple(sorted(kwargs.items()))
+    if typed:
+        key += tuple(type(v) for v in args)
+        if kwargs:
+            key += tuple(type(v) for _, v in sorted(kwargs.items()))
+    return key
+
+
+class _NoLock:
+    """A do-nothing stand-in for threading.Lock when thread_safe=False."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# Step 2: Sizes and disk keys, both from pickle
+# sys.getsizeof() is shallow: for a list it counts the array of pointers, not the items, so
+# a list of 500 ints "weighs" 4 KB whatever the ints are, and a list of large strings looks
+# as light as a list of small ones. The pickled length counts the contents too. It is not
+# the exact memory use, but it grows with it, which is what a byte budget needs.
+def _size_of(value):
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return sys.getsizeof(value)  # unpicklable: the shallow size is all we have
+
+
+# shelve keys must be strings. The key is a hash of the PICKLED (function, arguments) pair:
+# - repr() is not enough: different objects can share a repr, and objects with the default
+#   repr ("<Foo object at 0x7f...>") get a new one in every process, so they never hit;
+# - the function's module and qualified name keep functions sharing one file apart.
+# Arguments that cannot be pickled skip the disk tier (memory only). Sets of strings may
+# pickle in a different order in another process (hash randomization): a miss, never a
+# wrong result.
+def _disk_key(func, key):
+    try:
+        data = pickle.dumps((func.__module__, func.__qualname__, key), pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return hashlib.sha256(data).hexdigest()
+
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo",
+    ["hits", "misses", "evictions", "expirations", "disk_hits", "currsize", "currbytes"],
+)
+
+
+# Step 3: The decorator factory (3-layer pattern, like log_decorator in 0030_decorators2.py)
+def memoize(maxsize=128, ttl=None, max_bytes=None, typed=False, thread_safe=False, disk_path=None):
+    """
+    maxsize:   maximum number of entries kept in memory (None = unbounded).
+    ttl:       seconds an entry stays valid (None = forever).
+    max_bytes: maximum total pickled size of cached results (None = unbounded).
+    """
+
+    def decorator(func):
+        # OrderedDict keeps the entries in "least recently used first" order:
+        # move_to_end(key) on a hit, popitem(last=False) to evict the oldest.
+        cache = collections.OrderedDict()  # key -> (value, expires_at, size)
+        lock = threading.Lock() if thread_safe else _NoLock()
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "disk_hits": 0}
+        total_bytes = 0
+        disk = shelve.open(disk_path) if disk_path else None
+        clock = time.monotonic
+
+        def store(key, value):
+            nonlocal total_bytes
+            size = _size_of(value) if max_bytes is not None else 0
+            if max_bytes is not None and size > max_bytes:
+                return  # a single result bigger than the whole budget is never cached
+            expires_at = clock() + ttl if ttl is not None else None
+            with lock:
+                if key in cache:
+                    total_bytes -= cache.pop(key)[2]
+                cache[key] = (value, expires_at, size)
+                total_bytes += size
+                # Evict least recently used entries until we are within both limits.
+                while (maxsize is not None and len(cache) > maxsize) or (
+                    max_bytes is not None and total_bytes > max_bytes
+                ):
+                    _, (_, _, old_size) = cache.popitem(last=False)
+                    total_bytes -= old_size
+                    stats["evictions"] += 1
+
+        def lookup(key):
+            """Return (True, value) on a valid memory hit, else (False, None)."""
+            nonlocal total_bytes
+            with lock:
+                entry = cache.get(key)
+                if entry is None:
+                    return False, None
+                value, expires_at, size = entry
+                if expires_at is not None and clock() >= expires_at:
+                    del cache[key]  # expired entries are removed lazily, when touched
+                    total_bytes -= size
+                    stats["expirations"] += 1
+                    return False, None
+                cache.move_to_end(key)
+                stats["hits"] += 1
+                return True, value
+
+        def disk_lookup(disk_key):
+            # The disk stores wall-clock time (time.time), because monotonic time
+            # restarts with every process.
+            with lock:
+                entry = disk.get(disk_key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and time.time() >= expires_at:
+                return False, None
+            return True, value
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs, typed)
+            found, value = lookup(key)
+            if found:
+                return value
+
+            disk_key = _disk_key(func, key) if disk is not None else None
+            if disk_key is not None:
+                found, value = disk_lookup(disk_key)
+                if found:
+                    with lock:
+                        stats["disk_hits"] += 1
+                    store(key, value)  # promote to the memory tier
+                    return value
+
+            with lock:
+                stats["misses"] += 1
+            # The lock is NOT held while func runs: a recursive function such as factorial
+            # calls wrapper again, and other threads should not wait for a slow computation.
+            value = func(*args, **kwargs)
+            store(key, value)
+            if disk_key is not None:
+                expires_at = time.time() + ttl if ttl is not None else None
+                with lock:
+                    disk[disk_key] = (value, expires_at)
+            return value
+
+        def cache_info():
+            with lock:
+                return CacheInfo(currsize=len(cache), currbytes=total_bytes, **stats)
+
+        def cache_clear():
+            nonlocal total_bytes
+            with lock:
+                cache.clear()
+                total_bytes = 0
+                for name in stats:
+                    stats[name] = 0
+                if disk is not None:
+                    disk.clear()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_close = disk.close if disk is not None else (lambda: None)
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    # Example 1: Recursive factorial (from 0011_functions.py)
+    # Every factorial(n) call reuses factorial(n - 1) from the cache.
+    @memoize(maxsize=1000)
+    def factorial(n):
+        """Return the factorial of a non-negative integer n."""
+        if n == 0:
+            return 1
+        else:
+            return n * factorial(n - 1)
+
+    factorial(300)
+    print(factorial.cache_info())
+    # CacheInfo(hits=0, misses=301, evictions=0, expirations=0, disk_hits=0, currsize=301, currbytes=0)
+    factorial(301)  # only ONE new multiplication: factorial(300) is a hit
+    print(factorial.cache_info().hits)  # 1
+
+    # Example 2: typed keys and a TTL with power() (from 0013_functions3.py)
+    @memoize(maxsize=2, ttl=0.05, typed=True)
+    def power(base, exponent=2):
+        return base**exponent
+
+    power(3)
+    power(3.0)  # typed=True -> a different entry than power(3)
+    power(2, exponent=5)  # third entry -> the least recently used one is evicted
+    print(power.cache_info().evictions)  # 1
+    time.sleep(0.06)
+    power(2, exponent=5)  # expired -> recomputed
+    print(power.cache_info().expirations)  # 1
+
+    # Example 3: a byte budget instead of an entry count
+    @memoize(maxsize=None, max_bytes=3_000, thread_safe=True)
+    def big_list(n):
+        return list(range(n))
+
+    for n in range(100, 600, 100):
+        big_list(n)
+    info = big_list.cache_info()
+    print(info.currsize, info.currbytes <= 3_000)  # 3 True
+
+    # Why the pickled size: sys.getsizeof() does not look inside the list
+    text = ["a" * 10_000]
+    print(sys.getsizeof(text), _size_of(text))  # 64 10021
+
+    # Example 4: the disk tier survives a "restart" (a brand new decorated function)
+    path = os.path.join(tempfile.mkdtemp(), "power_cache")
+
+    def slow_power(base, exponent=2):
+        time.sleep(0.1)
+        return base**exponent
+
+    first_run = memoize(disk_path=path)(slow_power)
+    first_run(7, 3)
+    first_run.cache_close()
+
+    second_run = memoize(disk_path=path)(slow_power)
+    start = time.perf_counter()
+    print(second_run(7, 3))  # 343, read from disk without sleeping
+    print(f"{time.perf_counter() - start:.3f}s", second_run.cache_info().disk_hits)  # 0.000s 1
+    second_run.cache_close()
+
+    # Keyword arguments hit the disk tier too: the key's repr() is stable across runs
+    third_run = memoize(disk_path=path)(slow_power)
+    third_run(2, exponent=5)
+    third_run.cache_close()
+    fourth_run = memoize(disk_path=path)(slow_power)
+    print(fourth_run(2, exponent=5), fourth_run.cache_info().disk_hits)  # 32 1
+    fourth_run.cache_close()
+
+    # Another function in the same file, same arguments: its own entry, not slow_power's
+    def negative_power(base, exponent=2):
+        return -(base**exponent)
+
+    other = memoize(disk_path=path)(negative_power)
+    print(other(7, 3), other.cache_info().disk_hits)  # -343 0
+    other.cache_close()
@@ -0,0 +1,286 @@
+"""
+# Flattening Stacked Decorators: N concerns, ONE call frame
+
+# Stacking decorators (0030_decorators2.py) nests wrappers:
+#
+#   @timing_decorator
+#   @log_decorator("DEBUG")
+#   def add(x, y): ...
+#
+#   add(2, 3) -> timing wrapper(*args, **kwargs)      frame 1, packs (2, 3) into a tuple
+#             -> log wrapper(*args, **kwargs)         frame 2, packs them again
+#             -> original add(x, y)                   frame 3
+#
+# Every layer costs one Python frame plus one *args/**kwargs pack/unpack.
+
+# The idea here: a decorator does not return its own wrapper. Instead it only REGISTERS a
+# "concern" (a before hook and an after hook) and then GENERATES one wrapper for the original
+# function that calls every hook inline. When another concern is stacked on top, the wrapper
+# is generated again from scratch for the original function, so a stack of N concerns is
+# always a single frame.
+#
+# The generated wrapper is written with the real parameter list of the target function
+# (e.g. "def _wrapper(x, y):"), not *args/**kwargs, so arguments are passed straight through.
+"""
+
+import collections
+import functools
+import inspect
+import time
+
+
+# Step 1: Describing a concern
+# A concern is a "setup" function. It is called ONCE per decorated function and returns
+# (before, after):
+#   before()      -> runs before the call, returns a state value (or before is None)
+#   after(state)  -> runs after the call (even if it raised), gets before's state
+#                    (after() is called with no argument when there is no before hook)
+def concern(setup):
+    """Turn setup(func) -> (before, after) into a stackable decorator that fuses wrappers."""
+
+    def decorator(func):
+        fused = getattr(func, "__fused__", None)
+        # functools.wraps copies __dict__, so an ordinary decorator placed between two
+        # concerns has a __fused__ too; only the generated wrapper itself may be re-fused.
+        if fused is not None and fused[2] is func:
+            # 'func' is already a generated wrapper: start again from the original function
+            # and put the new concern OUTSIDE the existing ones (decorators apply bottom-up).
+            original, setups, _ = fused
+            return fuse(original, [setup] + setups)
+        return fuse(func, [setup])
+
+    return decorator
+
+
+# Step 2: Generating the single wrapper
+def _parameter_source(sig, prefix):
+    """Return (parameter list, call arguments, defaults) as source text for signature 'sig'."""
+    params, call_args, defaults = [], [], {}
+    star_added = False
+    for i, p in enumerate(sig.parameters.values()):
+        text = p.name
+        if p.kind is p.VAR_POSITIONAL:
+            text = "*" + p.name
+            call_args.append("*" + p.name)
+            star_added = True
+        elif p.kind is p.VAR_KEYWORD:
+            text = "**" + p.name
+            call_args.append("**" + p.name)
+        elif p.kind is p.KEYWORD_ONLY:
+            if not star_added:
+                params.append("*")  # keyword-only parameters need a bare * before them
+                star_added = True
+            call_args.append(f"{p.name}={p.name}")
+        else:
+            call_args.append(p.name)
+        if p.default is not p.empty:
+            # Defaults are passed by name, so any object works (not only ones with a repr).
+            defaults[f"{prefix}default{i}"] = p.default
+            text += f"={prefix}default{i}"
+        params.append(text)
+        if p.kind is p.POSITIONAL_ONLY and (
+            i + 1 == len(sig.parameters)
+            or list(sig.parameters.values())[i + 1].kind is not p.POSITIONAL_ONLY
+        ):
+            params.append("/")
+    return ", ".join(params), ", ".join(call_args), defaults
+
+
+def _fresh_prefix(sig):
+    """A prefix for our generated names that no parameter of 'sig' starts with."""
+    # The generated names (_func, _before0, _state0, ...) and the target's parameters share
+    # one namespace: a parameter called _func would hide the target. Adding underscores until
+    # no parameter name starts with the prefix rules out every collision.
+    prefix = "_"
+    while any(name.startswith(prefix) for name in sig.parameters):
+        prefix += "_"
+    return prefix
+
+
+def fuse(func, setups):
+    """Generate ONE wrapper for 'func' running every concern's hooks inline."""
+    sig = inspect.signature(func)
+    P = _fresh_prefix(sig)
+    param_src, call_src, defaults = _parameter_source(sig, P)
+    namespace = {f"{P}func": func, **defaults}
+
+    # Built from the inside out, exactly like nested decorators: every concern that has an
+    # after hook wraps everything inside it in try/finally. So before hooks run outside-in,
+    # after hooks inside-out, and if a before hook (or the function) raises, the after hooks
+    # of the concerns OUTSIDE it still run.
+    body = [f"return {P}func({call_src})"]
+    for i in reversed(range(len(setups))):
+        before, after = setups[i](func)
+        if after is not None:
+            namespace[f"{P}after{i}"] = after
+            argument = f"{P}state{i}" if before is not None else ""
+            body = ["try:", *("    " + line for line in body),
+                    "finally:", f"    {P}after{i}({argument})"]
+        if before is not None:
+            namespace[f"{P}before{i}"] = before
+            body.insert(0, f"{P}state{i} = {P}before{i}()")
+
+    # A fixed name: func.__name__ may not be an identifier (e.g. "<lambda>");
+    # update_wrapper() below copies the real name onto the wrapper.
+    lines = [f"def {P}wrapper({param_src}):", *("    " + line for line in body)]
+    source = "\n".join(lines)
+
+    exec(source, namespace)  # the source only contains names we generated ourselves
+    wrapper = functools.update_wrapper(namespace[f"{P}wrapper"], func)
+    wrapper.__fused__ = (func, setups, wrapper)
+    wrapper.__fused_source__ = source
+    return wrapper
+
+
+# Step 3: Concerns equivalent to timing_decorator and log_decorator
+TIMINGS = collections.defaultdict(lambda: [0, 0])  # name -> [calls, total ns]
+LOG_BUFFER = collections.deque(maxlen=10_000)  # appended to, never printed on the hot path
+
+
+def _timing_setup(func):
+    stats = TIMINGS[func.__qualname__]
+    clock = time.perf_counter_ns
+
+    def after(start):
+        stats[0] += 1
+        stats[1] += clock() - start
+
+    return clock, after  # before is perf_counter_ns itself: no extra Python frame
+
+
+timing = concern(_timing_setup)
+
+
+def log(level):
+    def setup(func):
+        record = (level, func.__name__)
+        append = LOG_BUFFER.append
+
+        def before():
+            append(record)
+
+        return before, None
+
+    return concern(setup)
+
+
+def counted(func):
+    """A minimal concern for the benchmark: count calls."""
+    calls = [0]
+
+    def before():
+        calls[0] += 1
+
+    return before, None
+
+
+# Step 4: The classic nested-closure version of the same concern, for comparison
+def counted_nested(func):
+    calls = [0]
+
+    def wrapper(*args, **kwargs):
+        calls[0] += 1
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def benchmark(depths=(1, 3, 5), calls=200_000):
+    def add(x, y):
+        return x + y
+
+    results = {}
+    for depth in depths:
+        nested, fused = add, add
+        for _ in range(depth):
+            nested = counted_nested(nested)
+            fused = concern(counted)(fused)
+        for label, target in (("nested", nested), ("fused", fused)):
+            start = time.perf_counter_ns()
+            for i in range(calls):
+                target(i, 1)
+            results[(depth, label)] = (time.perf_counter_ns() - start) / calls
+    return results
+
+
+if __name__ == "__main__":
+
+    @timing
+    @log("DEBUG")
+    def add(x, y):
+        return x + y
+
+    @timing
+    def divide(x, y=2, *, precision=None):
+        result = x / y
+        return round(result, precision) if precision is not None else result
+
+    print(add(2, 3))  # 5
+    print(divide(10))  # 5.0
+    print(divide(10, 3, precision=2))  # 3.33
+    print(inspect.signature(add))  # (x, y)
+    print(LOG_BUFFER[-1], TIMINGS[add.__qualname__][0])
+    # ('DEBUG', 'add') 1   (1 call recorded by the timing concern)
+
+    # The wrapper that actually runs: one function, both concerns inline.
+    print(add.__fused_source__)
+    # def _wrapper(x, y):
+    #     _state0 = _before0()
+    #     try:
+    #         _state1 = _before1()
+    #         return _func(x, y)
+    #     finally:
+    #         _after0(_state0)
+
+    # An ordinary decorator between two concerns is kept, not fused away
+    def loud(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            print("loud:", func.__name__)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    @timing
+    @loud
+    @log("DEBUG")
+    def multiply(x, y):
+        return x * y
+
+    print(multiply(2, 3))  # loud: multiply, then 6
+    print(timing(lambda x: x)(7))  # 7   (lambdas work too)
+
+    # Parameters named like the generated helpers do not collide with them
+    @timing
+    def apply(_func, x, _before0=1):
+        return _func(x) + _before0
+
+    print(apply(abs, -4))  # 5
+    print(apply.__fused_source__.splitlines()[0])  # def __wrapper(_func, x, _before0=__default2):
+
+    # A before hook that raises: the outer concern's after hook still runs, as when nesting
+    def _deny_setup(func):
+        def before():
+            raise PermissionError("denied")
+
+        return before, None
+
+    @timing
+    @concern(_deny_setup)
+    def secret():
+        return 42
+
+    try:
+        secret()
+    except PermissionError as e:
+        print(e, TIMINGS[secret.__qualname__][0])  # denied 1   (timing recorded the call)
+
+    for (depth, label), ns in benchmark().items():
+        print(f"{depth}-deep {label:<8}{ns:>8.0f} ns/call")
+    # Output (numbers vary):
+    # 1-deep nested       110 ns/call
+    # 1-deep fused         75 ns/call
+    # 3-deep nested       290 ns/call
+    # 3-deep fused        120 ns/call
+    # 5-deep nested       470 ns/call
+    # 5-deep fused        165 ns/call
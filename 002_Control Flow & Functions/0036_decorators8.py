@@ -0,0 +1,242 @@
+"""
+# Load-Shedding Decorators: @limit_concurrency(n) and @rate_limit(per_second, burst)
+
+# Both are built with the 3-layer factory pattern from 0030_decorators2.py:
+#   Layer 1 (factory) takes the settings, Layer 2 takes the function, Layer 3 runs per call.
+
+# - limit_concurrency(n): at most n calls may run AT THE SAME TIME. Uses a semaphore:
+#   a counter of free "slots"; acquire() takes a slot (waits if none), release() gives it back.
+# - rate_limit(per_second, burst): at most 'per_second' calls per second on average, with
+#   short bursts of up to 'burst' calls. Uses a token bucket:
+#     * the bucket holds at most 'burst' tokens and refills at 'per_second' tokens per second,
+#     * every call takes one token; no token -> wait for one (or reject).
+
+# Both work for normal functions (called from threads) and for 'async def' functions.
+# With reject=True they never wait: a call that cannot run right now raises RejectedError
+# immediately ("fail fast"), so an overloaded service sheds load instead of queueing forever.
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+import weakref
+
+
+class RejectedError(Exception):
+    """Raised when a call is rejected because a limit is reached (reject=True)."""
+
+
+# Step 1: The token bucket
+# Tokens are not added by a timer; they are computed lazily from the time elapsed since the
+# last call: tokens += elapsed * rate (capped at capacity). The lock is held only for this
+# arithmetic, never while sleeping, so it is also safe to use from an event loop.
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be > 0 and capacity >= 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity  # start full: allow an initial burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take one token. Return 0.0 on success, else the seconds until one is available."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+# Step 2: @rate_limit
+def rate_limit(per_second, burst=1, reject=False):
+    def decorator(func):
+        name = func.__name__
+        # One bucket per decorated function (like the semaphores of limit_concurrency):
+        # two functions decorated by the same rate_limit(...) object have separate limits.
+        bucket = TokenBucket(per_second, burst)
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                while True:
+                    wait = bucket.try_acquire()
+                    if not wait:
+                        break
+                    if reject:
+                        raise RejectedError(f"{name}: rate limit of {per_second}/s exceeded")
+                    await asyncio.sleep(wait)  # yields to other tasks instead of blocking
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            while True:
+                wait = bucket.try_acquire()
+                if not wait:
+                    break
+                if reject:
+                    raise RejectedError(f"{name}: rate limit of {per_second}/s exceeded")
+                time.sleep(wait)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# Step 3: @limit_concurrency
+# A threading.BoundedSemaphore cannot be awaited, and an asyncio.Semaphore cannot be used
+# from other threads, so each kind of function gets the matching semaphore.
+# An asyncio.Semaphore also belongs to the first event loop that waits on it; using it in
+# the next asyncio.run() raises RuntimeError. So it is created lazily, one per event loop,
+# and kept in a WeakKeyDictionary that forgets it when the loop is gone.
+def limit_concurrency(n, reject=False, timeout=None):
+    """
+    n:       maximum number of calls running at the same time.
+    reject:  raise RejectedError immediately instead of waiting for a free slot.
+    timeout: wait at most this many seconds for a slot, then raise RejectedError.
+    """
+    if n < 1:
+        raise ValueError("n must be >= 1")
+
+    def decorator(func):
+        name = func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                loop = asyncio.get_running_loop()
+                semaphore = semaphores.get(loop)
+                if semaphore is None:
+                    semaphore = semaphores[loop] = asyncio.Semaphore(n)
+                # The event loop runs one task at a time: nothing can take the slot between
+                # the locked() check and acquire(), so this check-then-act is safe.
+                if reject and semaphore.locked():
+                    raise RejectedError(f"{name}: {n} calls already running")
+                try:
+                    await asyncio.wait_for(semaphore.acquire(), timeout)
+                except asyncio.TimeoutError:
+                    raise RejectedError(f"{name}: no free slot within {timeout}s") from None
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    semaphore.release()
+
+            return async_wrapper
+
+        semaphore = threading.BoundedSemaphore(n)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if reject:
+                acquired = semaphore.acquire(blocking=False)
+            else:
+                acquired = semaphore.acquire(timeout=timeout)
+            if not acquired:
+                raise RejectedError(f"{name}: {n} calls already running")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                semaphore.release()
+
+        return wrapper
+
+    return decorator
+
+
+if __name__ == "__main__":
+    import concurrent.futures
+
+    # Example 1: rate_limit on a normal function (blocking mode)
+    @rate_limit(per_second=20, burst=5)
+    def add(x, y):
+        return x + y
+
+    start = time.perf_counter()
+    results = [add(i, 1) for i in range(25)]
+    print(f"25 calls took {time.perf_counter() - start:.2f}s")
+    # 25 calls took 1.00s   (5 immediately from the burst, then 20 at 20/s)
+
+    # Example 2: reject fast
+    @rate_limit(per_second=1, burst=2, reject=True)
+    def divide(x, y):
+        return x / y
+
+    for i in range(4):
+        try:
+            print(divide(10, 2))
+        except RejectedError as e:
+            print("Rejected:", e)
+    # 5.0
+    # 5.0
+    # Rejected: divide: rate limit of 1/s exceeded
+    # Rejected: divide: rate limit of 1/s exceeded
+
+    # Example 3: limit_concurrency with threads
+    running, peak = 0, 0
+    counter_lock = threading.Lock()
+
+    @limit_concurrency(3)
+    def slow_task(i):
+        global running, peak
+        with counter_lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with counter_lock:
+            running -= 1
+        return i
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as pool:
+        list(pool.map(slow_task, range(12)))
+    print("peak concurrency:", peak)  # peak concurrency: 3
+
+    # Example 4: async functions, with and without reject
+    @limit_concurrency(2)
+    async def fetch(i):
+        await asyncio.sleep(0.05)
+        return i
+
+    @limit_concurrency(2, reject=True)
+    async def fetch_or_reject(i):
+        await asyncio.sleep(0.05)
+        return i
+
+    @rate_limit(per_second=50, burst=1)
+    async def ping(i):
+        return i
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(i) for i in range(6)))
+        print(f"6 fetches, 2 at a time: {time.perf_counter() - start:.2f}s")  # ~0.15s
+
+        outcomes = await asyncio.gather(
+            *(fetch_or_reject(i) for i in range(4)), return_exceptions=True
+        )
+        print([type(o).__name__ if isinstance(o, Exception) else o for o in outcomes])
+        # [0, 1, 'RejectedError', 'RejectedError']
+
+        start = time.perf_counter()
+        await asyncio.gather(*(ping(i) for i in range(10)))
+        print(f"10 pings at 50/s: {time.perf_counter() - start:.2f}s")  # ~0.18s
+
+    asyncio.run(main())
+
+    # Example 5: the same decorated function in a second event loop
+    async def main_again():
+        await asyncio.gather(*(fetch(i) for i in range(6)))  # needs waiting, in a new loop
+        print("second asyncio.run: ok")
+
+    asyncio.run(main_again())  # second asyncio.run: ok
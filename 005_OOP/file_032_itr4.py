@@ -0,0 +1,182 @@
+# Case - 3: MyRange as a full lazy sequence
+# MyRange in file_032_itr2.py can only be iterated. "x in r" falls back to iterating until x is
+# found (O(n)), and len(r) and r[i] are not supported at all. The usual workaround,
+# list(MyRange(n)), materialises every number in memory.
+
+# But an arithmetic sequence is fully described by three numbers: start, stop and step.
+# Everything else can be CALCULATED instead of stored:
+#   length           -> (stop - start + step - 1) // step           (for step > 0)
+#   r[i]             -> start + i * step
+#   x in r           -> x is inside the bounds and (x - start) % step == 0
+#   r[a:b:c]         -> another MyRange with its own start/stop/step
+#   reversed(r)      -> iterate from the last element with -step
+# So every operation is O(1) and a MyRange of a billion numbers takes a few bytes.
+#
+# Python finds these operations through special methods:
+#   len(r) -> __len__,  r[i] / r[a:b] -> __getitem__,  x in r -> __contains__,
+#   reversed(r) -> __reversed__,  for x in r -> __iter__
+#
+# Note: like the built-in range (and unlike file_032_itr2.py), MyRange(5) is 0, 1, 2, 3, 4.
+
+import operator
+
+
+class MyRange:
+    def __init__(self, start, stop=None, step=1):
+        if stop is None:  # MyRange(stop), like range(stop)
+            start, stop = 0, start
+        if step == 0:
+            raise ValueError("MyRange() arg 3 must not be zero")
+        self.start, self.stop, self.step = start, stop, step
+        # The length is computed once; every other method builds on it.
+        if step > 0:
+            self._len = max(0, (stop - start + step - 1) // step)
+        else:
+            self._len = max(0, (start - stop - step - 1) // -step)
+
+    def __iter__(self):
+        # Each call returns a fresh iterator, as in file_032_itr2.py
+        return MyRangeIterator(self.start, self.step, self._len)
+
+    def __reversed__(self):
+        last = self.start + (self._len - 1) * self.step
+        return MyRangeIterator(last, -self.step, self._len)
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # slice.indices() turns a slice into concrete (start, stop, step) positions,
+            # handling negatives and None for us.
+            i, j, k = index.indices(self._len)
+            return MyRange(
+                self.start + i * self.step, self.start + j * self.step, self.step * k
+            )
+        index = operator.index(index)  # ints only: MyRange(5)[1.5] is a TypeError, as for range
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("MyRange index out of range")
+        return self.start + index * self.step
+
+    def __contains__(self, value):
+        if not isinstance(value, int):
+            # 2.0 == 2, so other numbers are compared the slow way, like the built-in range
+            return any(value == item for item in self)
+        offset = value - self.start
+        index, remainder = divmod(offset, self.step)
+        return remainder == 0 and 0 <= index < self._len
+
+    def index(self, value):
+        if isinstance(value, int) and value in self:
+            return (value - self.start) // self.step
+        raise ValueError(f"{value!r} is not in MyRange")
+
+    def count(self, value):
+        # Every element appears at most once
+        if isinstance(value, int):
+            return int(value in self)
+        return sum(1 for item in self if item == value)
+
+    def __eq__(self, other):
+        # Two ranges are equal if they produce the same numbers: MyRange(0, 3, 2) == MyRange(0, 4, 2)
+        if not isinstance(other, MyRange):
+            return NotImplemented
+        if self._len != other._len:
+            return False
+        if self._len == 0:
+            return True
+        if self.start != other.start:
+            return False
+        return self._len == 1 or self.step == other.step
+
+    def __hash__(self):
+        # Equal ranges must hash alike, so only what __eq__ compares goes in (like range)
+        if self._len == 0:
+            return hash((0, None, None))
+        return hash((self._len, self.start, self.step if self._len > 1 else None))
+
+    def __repr__(self):
+        if self.step == 1:
+            return f"MyRange({self.start}, {self.stop})"
+        return f"MyRange({self.start}, {self.stop}, {self.step})"
+
+
+class MyRangeIterator:
+    def __init__(self, current, step, remaining):
+        self.current = current
+        self.step = step
+        self.remaining = remaining
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining > 0:
+            val = self.current
+            self.current += self.step
+            self.remaining -= 1
+            return val
+        raise StopIteration
+
+
+r = MyRange(1, 20, 3)
+print(list(r))  # [1, 4, 7, 10, 13, 16, 19]
+print(len(r), r[2], r[-1])  # 7 7 19
+print(10 in r, 11 in r, r.count(13), r.index(13))  # True False 1 4
+print(r[1:5], list(r[1:5]))  # MyRange(4, 16, 3) [4, 7, 10, 13]
+print(r[::-2], list(r[::-2]))  # MyRange(19, -2, -6) [19, 13, 7, 1]
+print(list(reversed(r)))  # [19, 16, 13, 10, 7, 4, 1]
+print(list(MyRange(5)), list(MyRange(10, 0, -4)))  # [0, 1, 2, 3, 4] [10, 6, 2]
+
+# Works the same as the built-in range, on many cases
+for args in [(0, 10), (10, 0, -3), (-5, 5, 2), (3, 3), (0, 100, 7)]:
+    mine, builtin = MyRange(*args), range(*args)
+    assert list(mine) == list(builtin) and len(mine) == len(builtin)
+    assert list(mine[2:-1:2]) == list(builtin[2:-1:2])
+    assert list(reversed(mine)) == list(reversed(builtin))
+    assert all((x in mine) == (x in builtin) for x in range(-20, 120))
+print("same results as range()")  # same results as range()
+
+# Equal ranges hash alike, so a set or dict treats them as one key
+print(MyRange(0, 0) == MyRange(5, 5), len({MyRange(0, 0), MyRange(5, 5)}))  # True 1
+
+
+if __name__ == "__main__":
+    import sys
+    import timeit
+
+    # Benchmark: the lazy sequence vs. materialising a list
+    n = 10_000_000
+    lazy = MyRange(n)
+    print(f"MyRange object: {sys.getsizeof(lazy) + sys.getsizeof(lazy.__dict__)} bytes")
+
+    start_list = timeit.default_timer()
+    materialised = list(MyRange(n))
+    print(f"list(MyRange(n)): {timeit.default_timer() - start_list:.2f}s to build, "
+          f"{sys.getsizeof(materialised) / 1e6:.0f} MB (plus the int objects)")
+
+    def per_call_us(stmt, number):
+        return timeit.timeit(stmt, globals=globals(), number=number) / number * 1e6
+
+    print(f"{'operation':<16}{'MyRange':>12}{'list':>12}")
+    for label, lazy_stmt, list_stmt, number in [
+        ("x in r (end)", "n - 1 in lazy", "n - 1 in materialised", 5),
+        ("len(r)", "len(lazy)", "len(materialised)", 100_000),
+        ("r[i]", "lazy[n // 2]", "materialised[n // 2]", 100_000),
+        ("r[a:b] (1M)", "lazy[1000:1_001_000]", "materialised[1000:1_001_000]", 5),
+    ]:
+        print(f"{label:<16}{per_call_us(lazy_stmt, number):>10.2f}us"
+              f"{per_call_us(list_stmt, number):>10.2f}us")
+    # Output (numbers vary):
+    # MyRange object: 216 bytes
+    # list(MyRange(n)): 2.21s to build, 80 MB (plus the int objects)
+    # operation            MyRange        list
+    # x in r (end)          4.00us 168200.02us
+    # len(r)                0.20us      0.05us
+    # r[i]                  0.45us      0.06us
+    # r[a:b] (1M)           5.78us  12486.38us
+    # Lookups that a list does in C (len, r[i]) are a little faster on the list, but the
+    # O(n) ones (membership, slicing) are thousands of times faster on MyRange, and it never
+    # pays the seconds and megabytes needed to build the list in the first place.
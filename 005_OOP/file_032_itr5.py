@@ -0,0 +1,169 @@
+# Length hints and bulk reads for iterators
+# MyRangeIterator (file_032_itr2.py) and CountUp (file_032_itr3.py) hand out ONE value per
+# __next__ call, and every call runs a Python-level comparison, an increment and a method call.
+# Two additions help consumers that want many items at once:
+
+# 1. __length_hint__(): an iterator may tell Python how many items are probably left
+#    (operator.length_hint(it) reads it). list(it), tuple(it) and list.extend(it) use the hint
+#    to allocate the right size up front instead of growing the list step by step.
+#    A hint is only an estimate: it is allowed to be wrong, and must never raise.
+#
+# 2. A bulk API:
+#    - next_n(k) returns the next (up to) k items as an array('q') of 64-bit integers;
+#    - fill(buffer) writes as many items as fit into a preallocated, writable buffer (an
+#      array('q') or a memoryview with format 'q') and returns how many it wrote.
+#    Both build the values with range() and copy them with slice assignment, which run in C:
+#    Python code runs once per CALL, not once per item.
+#    Consumers that reuse one buffer (e.g. writing blocks to a file or a socket) allocate nothing.
+#
+# The iterator keeps working with next() and for loops; the bulk calls simply advance it.
+
+import operator
+from array import array
+
+
+class MyRange:
+    def __init__(self, n):
+        self.n = n
+
+    def __iter__(self):
+        return MyRangeIterator(self.n)
+
+
+class BulkReadMixin:
+    """
+    __length_hint__, next_n and fill for an iterator that hands out self.current, then
+    self.current + 1, ... up to self.last (inclusive). Shared by MyRangeIterator and CountUp.
+    """
+
+    def __length_hint__(self):
+        return max(0, self.last - self.current + 1)
+
+    def next_n(self, k):
+        """Return the next (up to) k items as an array('q'); an empty array at the end."""
+        stop = min(self.current + k, self.last + 1)
+        items = array("q", range(self.current, stop))
+        self.current = max(self.current, stop)
+        return items
+
+    def fill(self, buffer):
+        """Write the next items into 'buffer'; return how many were written (0 at the end)."""
+        stop = min(self.current + len(buffer), self.last + 1)
+        count = max(0, stop - self.current)
+        if count:
+            buffer[:count] = array("q", range(self.current, stop))
+            self.current = stop
+        return count
+
+
+class MyRangeIterator(BulkReadMixin):
+    def __init__(self, n):
+        self.n = n
+        self.current = 1
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.current <= self.n:
+            val = self.current
+            self.current += 1
+            return val
+        raise StopIteration
+
+    @property
+    def last(self):
+        return self.n
+
+
+class CountUp(BulkReadMixin):
+    def __init__(self, max_value):
+        self.max = max_value
+        self.current = 1  # also set here, so the hint is valid before iter() is called
+
+    def __iter__(self):
+        self.current = 1
+        return self
+
+    def __next__(self):
+        if self.current <= self.max:
+            value = self.current
+            self.current += 1
+            return value
+        raise StopIteration
+
+    # CountUp is its own iterator, so the bulk methods work on it directly. iter() rewinds
+    # 'current' to 1, as in file_032_itr3.py.
+    @property
+    def last(self):
+        return self.max
+
+
+itr = iter(MyRange(10))
+print(operator.length_hint(itr))  # 10
+print(next(itr), itr.next_n(4).tolist(), operator.length_hint(itr))  # 1 [2, 3, 4, 5] 5
+
+buffer = array("q", bytes(8 * 3))  # three zeroed 64-bit slots
+view = memoryview(buffer)
+while count := itr.fill(view):
+    print(buffer[:count].tolist())  # [6, 7, 8] then [9, 10]
+print(itr.next_n(4).tolist(), operator.length_hint(itr))  # [] 0
+
+c = iter(CountUp(5))
+print(next(c), c.next_n(2).tolist(), next(c), operator.length_hint(c))  # 1 [2, 3] 4 1
+# (list(c) would start again from 1: CountUp.__iter__ resets the count)
+print(operator.length_hint(CountUp(5)))  # 5   (a hint works before iter() as well)
+
+
+if __name__ == "__main__":
+    import time
+
+    n = 5_000_000
+
+    def timed(label, func):
+        start = time.perf_counter()
+        result = func()
+        print(f"{label:<34}{time.perf_counter() - start:.3f}s")
+        return result
+
+    class NoHint(MyRangeIterator):
+        __length_hint__ = None  # hides the hint, as in file_032_itr2.py
+
+    def best_of_5(label, make_iterator):
+        runs = []
+        for _ in range(5):
+            start = time.perf_counter()
+            list(make_iterator())
+            runs.append(time.perf_counter() - start)
+        print(f"{label:<34}{min(runs):.3f}s")
+
+    best_of_5("list(), no length hint", lambda: NoHint(n))
+    best_of_5("list(), with __length_hint__", lambda: MyRangeIterator(n))
+
+    # Copying all items into a preallocated array: one at a time vs. in blocks of 4096
+    def per_item():
+        out = array("q", bytes(8 * n))
+        for i, value in enumerate(MyRangeIterator(n)):
+            out[i] = value
+        return out
+
+    def bulk():
+        out = array("q", bytes(8 * n))
+        view, it, pos = memoryview(out), MyRangeIterator(n), 0
+        while count := it.fill(view[pos : pos + 4096]):
+            pos += count
+        return out
+
+    one_by_one = timed("copy, one next() per item", per_item)
+    print(timed("copy, fill() in blocks of 4096", bulk) == one_by_one)
+    # Output (numbers vary):
+    # list(), no length hint            0.630s
+    # list(), with __length_hint__      0.638s
+    # copy, one next() per item         1.196s
+    # copy, fill() in blocks of 4096    0.452s
+    # True
+    # The hint makes no measurable difference to list(): it only saves the list's
+    # re-allocations, which are cheap next to one Python __next__ call per item, and which
+    # of the two rows wins changes from run to run. What a hint is good for is sizing a
+    # buffer up front, e.g. array("q", bytes(8 * operator.length_hint(it))) for fill().
+    # The bulk API removes the per-item call and is 2.5-3x faster.
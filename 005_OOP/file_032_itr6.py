@@ -0,0 +1,134 @@
+# Shardable iterables: splitting one MyRange across worker processes
+# The iterable/iterator split of file_032_itr2.py has a useful consequence: the iterable
+# (MyRange) is just a small description of the data, and any number of independent iterators
+# can be created from it. Here we go one step further and split the DESCRIPTION itself into
+# N disjoint pieces ("shards"). The MyRange sequence of file_032_itr4.py already has everything
+# needed: slicing a MyRange gives another MyRange, computed in O(1), so
+#
+#     contiguous shard i = r[a:b]      one block of neighbouring values
+#     strided shard i    = r[i::n]     every n-th value, starting at position i
+#
+#     shard(MyRange(0, 10), 3)               -> MyRange(0, 4), MyRange(4, 7), MyRange(7, 10)
+#     shard(MyRange(0, 10), 3, strided=True) -> MyRange(0, 10, 3), MyRange(1, 10, 3), ...
+#
+# - contiguous: good for locality (e.g. reading one region of a file);
+# - strided: good for balance when the cost per item grows along the range, since every shard
+#   gets a mix of cheap and expensive items; but beware of costs that repeat with the stride:
+#   with 4 strided shards, two of them get only even numbers, which a prime test rejects at once.
+#
+# A shard is three integers, so it pickles into a few bytes: sending it to a worker process
+# costs nothing, and every worker iterates its own shard with no coordination.
+# reduce_shards() runs a function over all shards in a process pool and merges the results.
+# (shard() only slices, so it works for any sequence: range, list, MyRange, ...)
+
+import concurrent.futures
+import functools
+import os
+
+from file_032_itr4 import MyRange  # importing it also runs that file's short demo
+
+
+def shard(sequence, n, strided=False):
+    """
+    Split 'sequence' into at most n disjoint slices that together cover every item once.
+    Fewer than n come back when there are fewer than n items: no shard is empty.
+    """
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    n = min(n, len(sequence))
+    if strided:
+        return [sequence[i::n] for i in range(n)]
+    # Contiguous: the first (length % n) shards get one extra item.
+    size, extra = divmod(len(sequence), n) if n else (0, 0)
+    bounds = [i * size + min(i, extra) for i in range(n + 1)]
+    return [sequence[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def reduce_shards(func, sequence, merge, shards=None, strided=False, workers=None):
+    """
+    Run func(shard) for every shard of 'sequence' in a process pool and combine the results
+    with merge(a, b), like functools.reduce. An empty sequence gives func(empty slice).
+
+    func and merge must be picklable (module-level functions or operator.* functions).
+    """
+    workers = workers or os.cpu_count() or 1
+    parts = shard(sequence, shards or workers, strided=strided)
+    if not parts:
+        return func(sequence[:0])  # nothing to send to the pool
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(func, parts)
+        return functools.reduce(merge, results)
+
+
+# Reducers: each one iterates a whole shard and returns one small result
+def count_digits_of_powers(values):
+    # len(str(3 ** x)): converting a bigger number to text costs more, so the work per item
+    # grows along the range.
+    return sum(len(str(3**x)) for x in values)
+
+
+def min_max(values):
+    it = iter(values)
+    lo = hi = next(it, None)
+    if lo is None:
+        return None  # no values: nothing to report
+    for x in it:
+        lo, hi = min(lo, x), max(hi, x)
+    return lo, hi
+
+
+def merge_min_max(a, b):
+    if a is None or b is None:
+        return b if a is None else a
+    return min(a[0], b[0]), max(a[1], b[1])
+
+
+if __name__ == "__main__":
+    import operator
+    import pickle
+    import time
+
+    r = MyRange(0, 10)
+    print(shard(r, 3))  # [MyRange(0, 4), MyRange(4, 7), MyRange(7, 10)]
+    print(shard(r, 3, strided=True))  # [MyRange(0, 10, 3), MyRange(1, 10, 3), MyRange(2, 10, 3)]
+    r = MyRange(5, -20, -3)
+    print(sorted(x for s in shard(r, 4) for x in s) == sorted(r))  # True: disjoint, complete
+    print(len(pickle.dumps(shard(MyRange(0, 10**12), 8)[3])), "bytes")  # 100 bytes
+
+    print(reduce_shards(min_max, MyRange(-7, 1000, 3), merge_min_max))  # (-7, 998)
+    print(shard(MyRange(0, 3), 4))  # [MyRange(0, 1), MyRange(1, 2), MyRange(2, 3)]: none empty
+    print(reduce_shards(min_max, MyRange(0, 3), merge_min_max, shards=4))  # (0, 2)
+    print(reduce_shards(min_max, MyRange(0, 0), merge_min_max))  # None: no values at all
+
+    # Benchmark: a reducer whose cost per item grows with x
+    n = 8000
+    func = count_digits_of_powers
+    start = time.perf_counter()
+    expected = func(MyRange(0, n))
+    print(f"one process:          {time.perf_counter() - start:.2f}s ({expected} digits)")
+    for strided in (False, True):
+        start = time.perf_counter()
+        total = reduce_shards(func, MyRange(0, n), operator.add, shards=4, strided=strided)
+        label = "strided" if strided else "contiguous"
+        print(f"4 shards, {label + ':':<11} {time.perf_counter() - start:.2f}s ({total} digits)")
+
+    # Balance: the work in each shard (timed one after another, so this part does not depend
+    # on the number of cores). The pool finishes when its SLOWEST shard does.
+    for strided in (False, True):
+        costs = []
+        for part in shard(MyRange(0, n), 4, strided=strided):
+            start = time.perf_counter()
+            func(part)
+            costs.append(time.perf_counter() - start)
+        label = "strided" if strided else "contiguous"
+        print(f"{label + ':':<12}" + " ".join(f"{c:.2f}s" for c in costs))
+    # Output (numbers vary with the number of CPU cores):
+    # one process:          0.93s (15269970 digits)
+    # 4 shards, contiguous: 0.93s (15269970 digits)
+    # 4 shards, strided:    0.94s (15269970 digits)
+    # (measured on a 1-CPU machine, so the pool cannot be faster than one process)
+    # contiguous: 0.02s 0.12s 0.28s 0.53s
+    # strided:    0.22s 0.23s 0.22s 0.22s
+    # With 4 free cores the contiguous split waits for its last shard (the most expensive
+    # numbers), while the strided split gives every worker the same mix of cheap and costly
+    # items, so all workers finish together.
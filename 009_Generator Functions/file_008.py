@@ -0,0 +1,163 @@
+# Chunked (block) generators
+# count_up(n) in file_002.py and squares(n) in file_003.py yield ONE Python int per next().
+# Each next() resumes the generator frame, runs a few bytecodes and suspends it again.
+# For millions of items, that per-item cost is most of the runtime.
+
+# A chunked generator yields BLOCKS of items instead: an array.array (or a NumPy array)
+# holding e.g. 4096 ints. One resume now produces 4096 items, and the block is filled by
+# C code (range, list(), NumPy) or a tight comprehension, not by a resumed generator frame.
+#
+# array.array is a compact, typed sequence from the standard library:
+#   array("q", [1, 2, 3])  -> signed 64-bit ints stored as raw machine values (8 bytes each)
+# unlike a list, which stores pointers to separate int objects (28+ bytes each).
+
+import itertools
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: blocks fall back to lists (or array.array)
+    np = None
+
+DEFAULT_CHUNK = 4096
+
+
+# The scalar generators, as in file_002.py and file_003.py
+def count_up(n):
+    i = 0
+    while i < n:
+        yield i
+        i += 1
+
+
+def squares(n):
+    for i in range(n):
+        yield i * i
+
+
+# Chunked versions
+# backend picks the block type:
+#   "numpy": NumPy int64 array, filled by vectorized C code (fastest, needs NumPy)
+#   "array": array.array("q"), compact typed storage (8 bytes per item) that can be handed
+#            to file.write(), memoryview(), socket.send() without copying. Opt-in: filling
+#            it from Python ints is SLOWER than the scalar generators (see the benchmark)
+#   "list":  a plain list, built by list(range(...)) in C (fast, but ~4x the memory)
+# backend=None means "numpy" if it is installed, else "list": the only pure-Python block
+# type that is faster than the scalar generators.
+def _pick_backend(backend):
+    if backend is None:
+        return "numpy" if np is not None else "list"
+    if backend == "numpy" and np is None:
+        raise ImportError("backend='numpy' but NumPy is not installed")
+    if backend not in ("numpy", "array", "list"):
+        raise ValueError(f"unknown backend: {backend!r}")
+    return backend
+
+
+def count_up_chunks(n, chunk_size=DEFAULT_CHUNK, backend=None):
+    """Yield 0 .. n-1 in blocks of at most chunk_size items."""
+    backend = _pick_backend(backend)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        if backend == "numpy":
+            yield np.arange(start, stop, dtype=np.int64)
+        elif backend == "array":
+            yield array("q", range(start, stop))
+        else:
+            yield list(range(start, stop))
+
+
+def squares_chunks(n, chunk_size=DEFAULT_CHUNK, backend=None):
+    """Yield 0, 1, 4, 9, ... (n items) in blocks of at most chunk_size items."""
+    backend = _pick_backend(backend)
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        if backend == "numpy":
+            block = np.arange(start, stop, dtype=np.int64)
+            yield block * block
+            continue
+        # Without NumPy each square is still one Python multiplication, but the loop runs
+        # inside a list comprehension: no generator suspend/resume per item.
+        block = [i * i for i in range(start, stop)]
+        yield array("q", block) if backend == "array" else block
+
+
+# Adapters
+# to_blocks: any per-item generator -> block generator.
+# islice(it, k) takes the next k items of the SAME iterator, so consecutive calls walk
+# through the source without copying it. typecode=None keeps arbitrary objects in lists.
+def to_blocks(gen, chunk_size=DEFAULT_CHUNK, typecode="q"):
+    it = iter(gen)
+    while True:
+        if typecode is None:
+            block = list(itertools.islice(it, chunk_size))
+        else:
+            block = array(typecode, itertools.islice(it, chunk_size))
+        if not block:
+            return
+        yield block
+
+
+# from_blocks: block generator -> per-item generator (for code that expects scalars).
+# tolist() converts a whole block to Python objects in one C call (both array.array and
+# NumPy arrays have it); iterating a NumPy array directly would give NumPy scalars.
+def from_blocks(blocks):
+    for block in blocks:
+        if hasattr(block, "tolist"):
+            yield from block.tolist()
+        else:
+            yield from block
+
+
+# Benchmark: items per second, the consumer sums everything.
+# The scalar generators pay one frame resume per item; the block generators pay one per
+# block, and sum() over a block runs in C.
+def benchmark(n=2_000_000, chunk_size=DEFAULT_CHUNK):
+    candidates = {
+        "count_up (scalar)": lambda: sum(count_up(n)),
+        "squares (scalar)": lambda: sum(squares(n)),
+    }
+    backends = ["array", "list"] + (["numpy"] if np is not None else [])
+    for backend in backends:
+        # Default arguments freeze the current 'backend' inside each lambda.
+        candidates[f"count_up_chunks ({backend})"] = lambda b=backend: sum(
+            int(sum(block)) for block in count_up_chunks(n, chunk_size, b)
+        )
+        candidates[f"squares_chunks ({backend})"] = lambda b=backend: sum(
+            int(sum(block)) for block in squares_chunks(n, chunk_size, b)
+        )
+    results = {}
+    for label, run in candidates.items():
+        start = time.perf_counter()
+        run()
+        results[label] = n / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == "__main__":
+    blocks = count_up_chunks(10, chunk_size=4, backend="array")
+    print(next(blocks))  # array('q', [0, 1, 2, 3])
+    print(list(from_blocks(blocks)))  # [4, 5, 6, 7, 8, 9]
+
+    print(list(to_blocks(squares(5), chunk_size=2)))
+    # [array('q', [0, 1]), array('q', [4, 9]), array('q', [16])]
+
+    # Round trip: blocks -> items gives exactly the scalar sequence
+    assert list(from_blocks(squares_chunks(10_000, 128, "array"))) == list(squares(10_000))
+
+    for label, rate in benchmark().items():
+        print(f"{label:<26}{rate / 1e6:>8.1f} M items/s")
+    # Output (numbers vary; NumPy rows appear only when it is installed):
+    # count_up (scalar)             14.3 M items/s
+    # squares (scalar)              10.9 M items/s
+    # count_up_chunks (array)        9.7 M items/s
+    # squares_chunks (array)         6.6 M items/s
+    # count_up_chunks (list)        32.1 M items/s
+    # squares_chunks (list)         13.3 M items/s
+    #
+    # Building an array.array from Python ints costs MORE than the scalar generator, which is
+    # why it is not the default; its gain is compact storage and zero-copy hand-off
+    # (tobytes(), memoryview, file.write). Without NumPy the default is "list". The large
+    # speed-up comes from NumPy blocks (backend="numpy"): arange(), '*' and .sum() never
+    # create a Python int per item.
@@ -0,0 +1,163 @@
+# Vectorized safe division with inf/NaN masking
+# safe_divider() in file_005.py divides ONE pair per send(), and a zero denominator is
+# handled by raising ZeroDivisionError and turning it into float("inf"). Raising and catching
+# an exception is one of the most expensive things Python does, and here it happens once per
+# bad pair.
+
+# divide_bulk(numerators, denominators) divides whole columns at once, without raising:
+# 1. Find the positions of the zero denominators (a "mask").
+# 2. Replace those denominators by 1 so the division itself can never fail.
+# 3. Divide everything in one C-level pass (map(operator.truediv, ...) or NumPy).
+# 4. Overwrite the masked positions with the value the zero-division policy asks for.
+#
+# zero_policy:
+#   "inf"  -> every x / 0 is inf, exactly like safe_divider() (the default)
+#   "ieee" -> IEEE 754 / NumPy rules: +inf, -inf by the sign of x, and NaN for 0 / 0
+
+import collections
+import itertools
+import math
+import operator
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the pure-Python path below is used instead
+    np = None
+
+DivisionResult = collections.namedtuple("DivisionResult", ["values", "zero_count"])
+
+
+def _zero_result(numerator, zero_policy):
+    if zero_policy == "inf":
+        return math.inf
+    if numerator > 0:
+        return math.inf
+    if numerator < 0:
+        return -math.inf
+    return math.nan  # 0 / 0 (and NaN / 0)
+
+
+def divide_bulk(numerators, denominators, zero_policy="inf"):
+    """
+    Divide two equal-length sequences element by element, without raising.
+
+    Returns:
+        DivisionResult: (values, zero_count) where values is an array('d') (or a NumPy
+        array when NumPy inputs are given) and zero_count is the number of zero denominators.
+    """
+    if zero_policy not in ("inf", "ieee"):
+        raise ValueError(f"unknown zero_policy: {zero_policy!r}")
+    if len(numerators) != len(denominators):
+        raise ValueError("numerators and denominators must have the same length")
+
+    if np is not None and isinstance(numerators, np.ndarray):
+        return _divide_bulk_numpy(numerators, np.asarray(denominators), zero_policy)
+
+    # Step 1: the mask. map(operator.not_, ...) is True where the denominator is 0;
+    # compress() keeps the matching indices. Both run in C.
+    zero_positions = list(
+        itertools.compress(range(len(denominators)), map(operator.not_, denominators))
+    )
+
+    # Step 2: a copy of the denominators with the zeros replaced by 1.
+    safe = list(denominators)
+    for i in zero_positions:
+        safe[i] = 1.0
+
+    # Step 3: one C-level pass over all pairs.
+    values = array("d", map(operator.truediv, numerators, safe))
+
+    # Step 4: patch the masked positions (only the zeros are visited in Python).
+    for i in zero_positions:
+        values[i] = _zero_result(numerators[i], zero_policy)
+    return DivisionResult(values, len(zero_positions))
+
+
+def _divide_bulk_numpy(numerators, denominators, zero_policy):
+    zero_mask = denominators == 0
+    zero_count = int(np.count_nonzero(zero_mask))
+    if zero_policy == "ieee":
+        # NumPy already follows IEEE rules; errstate only silences the warnings.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return DivisionResult(numerators / denominators, zero_count)
+    out = np.full(numerators.shape, np.inf)
+    np.divide(numerators, denominators, out=out, where=~zero_mask)
+    return DivisionResult(out, zero_count)
+
+
+# Batched version of intensive_calc()/compute() from 006_Exception Handling/file_002.py.
+# The try/except/else/finally structure is the same; only the ZeroDivisionError case
+# disappears, because zero denominators are counted instead of raised.
+def intensive_calc_batch(rows: list) -> DivisionResult:
+    """
+    Performs division for many dictionaries at once.
+
+    Args:
+        rows (list): dictionaries containing 'numerator' and 'denominator' keys.
+
+    Returns:
+        DivisionResult: one quotient per row (inf for zero denominators) and the zero count.
+
+    Raises:
+        KeyError: If 'numerator' or 'denominator' keys are missing in a dictionary.
+        TypeError: If the values are not numbers.
+    """
+    numerators = list(map(operator.itemgetter("numerator"), rows))
+    denominators = list(map(operator.itemgetter("denominator"), rows))
+    return divide_bulk(numerators, denominators)
+
+
+def compute_batch(rows: list):
+    try:
+        result = intensive_calc_batch(rows)
+    except KeyError as e:
+        return f"Error: missing key {e}"
+    else:
+        doubled = array("d", map(operator.mul, result.values, itertools.repeat(2)))
+        return DivisionResult(doubled, result.zero_count)
+    finally:
+        print("compute_batch() completed")
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    result = divide_bulk([10, 5, -3, 0, 7], [2, 0, 0, 0, 7])
+    print(list(result.values), result.zero_count)  # [5.0, inf, inf, inf, 1.0] 3
+
+    result = divide_bulk([10, 5, -3, 0, 7], [2, 0, 0, 0, 7], zero_policy="ieee")
+    print(list(result.values))  # [5.0, inf, -inf, nan, 1.0]
+
+    output = compute_batch(
+        [{"numerator": 10, "denominator": 2}, {"numerator": 5, "denominator": 0}]
+    )
+    print("Output", list(output.values), "zero denominators:", output.zero_count)
+    # compute_batch() completed
+    # Output [10.0, inf] zero denominators: 1
+
+    # Benchmark: the per-pair raise/catch of safe_divider() vs. divide_bulk()
+    n = 200_000
+    nums = [random.randint(-100, 100) for _ in range(n)]
+    dens = [random.choice([0, 1, 2, 3, 4]) for _ in range(n)]
+
+    start = time.perf_counter()
+    expected = []
+    for x, y in zip(nums, dens):
+        try:
+            expected.append(x / y)
+        except ZeroDivisionError:
+            expected.append(float("inf"))
+    per_pair = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = divide_bulk(nums, dens)
+    bulk = time.perf_counter() - start
+
+    assert list(result.values) == expected
+    print(f"try/except per pair: {per_pair:.3f}s, divide_bulk: {bulk:.3f}s")
+    # Output (numbers vary; 20% zero denominators):
+    # try/except per pair: 0.085s, divide_bulk: 0.053s
+    # The gap grows with the share of zeros (each one is a raise + catch) and becomes
+    # much larger with NumPy arrays as input, where no Python float is created per pair.
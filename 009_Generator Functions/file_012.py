@@ -0,0 +1,184 @@
+# Async generators connected by a bounded queue with backpressure
+# listener() in file_006.py is a synchronous sink: the caller pushes data with send() and
+# stops it with close(), which raises GeneratorExit inside so it can clean up.
+
+# The asyncio equivalent:
+# - Producers are ASYNC generators (async def + yield): they can await I/O between items.
+# - Consumers are async generators too, driven with "await agen.asend(item)".
+# - Between them sits a bounded queue with two watermarks:
+#     * when the queue reaches 'high' items, the producer is paused (put() waits),
+#     * it is resumed only after the consumer has drained the queue down to 'low' items.
+#   A slow consumer therefore throttles the producer, and memory stays bounded by 'high'.
+#   Using two levels (hysteresis) avoids waking the producer for every single free slot.
+# - Cleanup: agen.aclose() raises GeneratorExit inside an async generator, exactly like
+#   gen.close(). We call it in 'finally', so it also runs when the task is CANCELLED.
+#   But if the consumer is cancelled while it is itself awaiting (a slow consumer, the
+#   backpressure case), CancelledError is raised INSIDE it instead, and the generator is
+#   finished before aclose() comes. So the generators clean up in 'finally' as well, not in
+#   'except GeneratorExit', which would only catch the first case.
+
+import asyncio
+import collections
+
+
+class QueueClosed(Exception):
+    """Raised by get() when the queue is closed and empty."""
+
+
+class WatermarkQueue:
+    def __init__(self, high=100, low=None):
+        if low is None:
+            low = high // 2
+        if not 0 <= low < high:
+            raise ValueError("watermarks must satisfy 0 <= low < high")
+        self.high, self.low = high, low
+        self.items = collections.deque()
+        self.not_empty = asyncio.Event()
+        self.can_put = asyncio.Event()
+        self.can_put.set()
+        self.closed = False
+        # Statistics
+        self.max_size = 0
+        self.pauses = 0
+
+    async def put(self, item):
+        if self.closed:
+            raise QueueClosed("put() on a closed queue")
+        # Event.wait() returns immediately while the event is set (below the high watermark).
+        await self.can_put.wait()
+        self.items.append(item)
+        self.max_size = max(self.max_size, len(self.items))
+        self.not_empty.set()
+        if len(self.items) >= self.high:
+            self.can_put.clear()  # pause the producer
+            self.pauses += 1
+
+    async def get(self):
+        while not self.items:
+            if self.closed:
+                raise QueueClosed("queue is closed and empty")
+            self.not_empty.clear()
+            await self.not_empty.wait()
+        item = self.items.popleft()
+        if not self.can_put.is_set() and len(self.items) <= self.low:
+            self.can_put.set()  # resume the producer
+        return item
+
+    def close(self):
+        """No more items will be put; get() raises QueueClosed once the queue is drained."""
+        self.closed = True
+        self.not_empty.set()  # wake a consumer that waits on an empty queue
+
+
+# Pumps: drive an async generator producer into the queue, and the queue into a consumer.
+async def pump_from(producer, queue):
+    try:
+        async for item in producer:
+            await queue.put(item)
+    finally:
+        queue.close()
+        await producer.aclose()  # GeneratorExit inside the producer, also on cancellation
+
+
+async def pump_to(queue, consumer):
+    await consumer.asend(None)  # prime: run up to the first 'data = yield'
+    try:
+        while True:
+            try:
+                item = await queue.get()
+            except QueueClosed:
+                return
+            await consumer.asend(item)
+    finally:
+        await consumer.aclose()  # GeneratorExit inside the consumer, also on cancellation
+
+
+async def connect(producer, consumer, high=100, low=None):
+    """Run producer -> queue -> consumer until the producer is exhausted (or cancelled)."""
+    queue = WatermarkQueue(high, low)
+    tasks = [
+        asyncio.create_task(pump_from(producer, queue)),
+        asyncio.create_task(pump_to(queue, consumer)),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # If connect() itself is cancelled (or one side failed), stop the other side too.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return queue
+
+
+# An async producer and the async version of listener() from file_006.py
+async def numbers(n, delay=0.0):
+    try:
+        for i in range(n):
+            if delay:
+                await asyncio.sleep(delay)
+            yield i
+    finally:
+        print("producer: cleaning up")
+
+
+async def listener(delay=0.0, verbose=True):
+    received = 0
+    try:
+        while True:
+            data = yield
+            received += 1
+            if verbose:
+                print("Received: ", data)
+            if delay:
+                await asyncio.sleep(delay)  # a slow consumer
+    finally:
+        # Runs on aclose() (GeneratorExit) AND on cancellation while awaiting the sleep
+        # (CancelledError); both propagate afterwards. (No yield allowed in here.)
+        print(f"consumer: cleaning up & exiting after {received} items")
+
+
+if __name__ == "__main__":
+
+    async def main():
+        # Example 1: the basics
+        await connect(numbers(3), listener())
+        # producer: cleaning up        (the producer runs ahead until the queue is full)
+        # Received:  0
+        # Received:  1
+        # Received:  2
+        # consumer: cleaning up & exiting after 3 items
+
+        # Example 2: a fast producer and a slow consumer -> the queue never exceeds 'high'
+        queue = await connect(numbers(500), listener(delay=0.001, verbose=False), high=20, low=5)
+        print(f"max queue size: {queue.max_size}, producer paused {queue.pauses} times")
+        # producer: cleaning up
+        # consumer: cleaning up & exiting after 500 items
+        # max queue size: 20, producer paused 33 times
+
+        # Example 3: cancellation runs the same cleanup as close()
+        task = asyncio.create_task(connect(numbers(10_000, delay=0.001), listener(verbose=False)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            print("pipeline cancelled")
+        # producer: cleaning up
+        # consumer: cleaning up & exiting after 40 items
+        # pipeline cancelled
+        # (The producer task is cancelled first, so its cleanup usually prints first. If the
+        # consumer was already woken up by a new item at that moment, the two lines swap.)
+
+        # Example 4: cancelled while the slow consumer is awaiting: it still cleans up
+        task = asyncio.create_task(connect(numbers(10_000), listener(delay=0.01, verbose=False)))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            print("pipeline cancelled")
+        # consumer: cleaning up & exiting after 5 items
+        # producer: cleaning up
+        # pipeline cancelled
+
+    asyncio.run(main())
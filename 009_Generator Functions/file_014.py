@@ -0,0 +1,191 @@
+# Checkpointable, resumable iterators
+# A generator such as count_up(n) (file_002.py) keeps its position only inside its frame
+# (the local variable i). Frames cannot be saved to disk, so if the process crashes after
+# 3 hours of streaming, the next run starts again from zero.
+
+# The solution is to keep the position in an OBJECT instead of a frame:
+# - ResumableIterator: an iterator class (like CountUp in 005_OOP/file_032_itr3.py) that can
+#   describe its position with get_state() and jump back to it with set_state(state).
+#   The state must be small and JSON-serialisable (e.g. {"i": 1234}).
+# - Checkpointer: drives a ResumableIterator and, every N items, writes its state to a file.
+#   resume() reads that file and continues exactly where the last checkpoint was taken.
+#
+# Keeping the overhead low (the target is < 1%; the benchmark below prints the measured ratio):
+# - Items are handed out in blocks of 'every' with itertools.islice(it, every), and the blocks
+#   are joined with itertools.chain.from_iterable(). Both are lazy, so each item reaches the
+#   consumer as soon as it is read (nothing is buffered, which matters for a slow stream), and
+#   both run in C: per item the checkpointing layer adds one islice step and no Python code.
+# - To notice the end of the stream without counting items, each block starts by reading its
+#   first item with next(it, _END); if that is already _END, the stream is over.
+# - A checkpoint is one tiny JSON write every N items; N is chosen so that cost is
+#   negligible compared with N items of work.
+# - The file is written to a temporary name and then renamed with os.replace(), which is
+#   atomic: a crash in the middle of a write never leaves a half-written checkpoint.
+
+import itertools
+import json
+import os
+from abc import ABC, abstractmethod
+
+
+class ResumableIterator(ABC):
+    """Base class: an iterator whose position can be saved and restored."""
+
+    def __iter__(self):
+        return self
+
+    @abstractmethod
+    def __next__(self):
+        pass
+
+    @abstractmethod
+    def get_state(self):
+        """Return a small JSON-serialisable description of the current position."""
+
+    @abstractmethod
+    def set_state(self, state):
+        """Continue from a state previously returned by get_state()."""
+
+
+class CountUp(ResumableIterator):
+    """count_up(n) from file_002.py as a resumable iterator: yields 0 .. n-1."""
+
+    def __init__(self, n):
+        self.n = n
+        self.i = 0
+
+    def __next__(self):
+        if self.i < self.n:
+            value = self.i
+            self.i += 1
+            return value
+        raise StopIteration
+
+    def get_state(self):
+        return {"i": self.i}
+
+    def set_state(self, state):
+        self.i = state["i"]
+
+
+class Checkpointer:
+    """
+    Iterate over a ResumableIterator, saving its state to 'path' every 'every' items.
+
+    'extra' is a dict for the consumer's own state (e.g. a running total); it is saved with
+    each checkpoint and restored by resume(), so both sides stay consistent.
+    """
+
+    def __init__(self, iterator, path, every=100_000, extra=None):
+        self.iterator = iterator
+        self.path = path
+        self.every = every
+        self.extra = extra if extra is not None else {}
+
+    @classmethod
+    def resume(cls, iterator, path, every=100_000, extra=None):
+        """Restore 'iterator' (and extra) from the checkpoint at 'path', if there is one."""
+        checkpointer = cls(iterator, path, every, extra)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            iterator.set_state(saved["state"])
+            checkpointer.extra.update(saved["extra"])
+        return checkpointer
+
+    def save(self):
+        data = {
+            "state": self.iterator.get_state(),
+            "extra": self.extra,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)  # atomic rename
+
+    def __iter__(self):
+        # chain.from_iterable hands out the items of each block from C. Our generator below
+        # is resumed once per BLOCK, not once per item.
+        return itertools.chain.from_iterable(self._blocks())
+
+    def _blocks(self):
+        first_block = True
+        while True:
+            # chain asks for the next block only when the consumer asks for the item AFTER
+            # the current block, i.e. it has finished processing the whole block. Saving at
+            # this point means a checkpoint never covers an item that was not processed.
+            if not first_block:
+                self.save()
+            first_block = False
+            first = next(self.iterator, _END)
+            if first is _END:  # the stream is over (the last block may have been shorter)
+                self.save()
+                return
+            yield itertools.chain((first,), itertools.islice(self.iterator, self.every - 1))
+
+
+_END = object()
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    path = os.path.join(tempfile.mkdtemp(), "count_up.checkpoint")
+
+    # Run 1: sum the numbers, but "crash" after 25,000 items.
+    # The consumer's running total lives in checkpointer.extra, so it is saved as well.
+    run1 = Checkpointer.resume(CountUp(100_000), path, every=10_000, extra={"total": 0})
+    for value in run1:
+        if value == 25_000:
+            break  # simulated crash: the last checkpoint was taken after 20,000 items
+        run1.extra["total"] += value
+
+    # Run 2: a new process would do exactly this: build the iterator and resume.
+    run2 = Checkpointer.resume(CountUp(100_000), path, every=10_000, extra={"total": 0})
+    print("resuming at item", run2.iterator.i, "with total", run2.extra["total"])
+    # resuming at item 20000 with total 199990000
+    for value in run2:
+        run2.extra["total"] += value
+    print(run2.extra["total"] == sum(range(100_000)), run2.iterator.i)  # True 100000
+
+    # Overhead on the hot loop: plain iteration vs. checkpointed iteration (best of 5 runs,
+    # since single runs on a busy machine vary by more than the 1% we are looking for)
+    n, every = 5_000_000, 500_000
+
+    def best_of(func, runs=5):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    def run_plain():
+        for _ in CountUp(n):
+            pass
+
+    def run_checkpointed():
+        for _ in Checkpointer(CountUp(n), path, every=every):
+            pass
+
+    plain, checkpointed = best_of(run_plain), best_of(run_checkpointed)
+    overhead = (checkpointed - plain) / plain
+    verdict = "met" if overhead < 0.01 else "NOT met"
+    print(f"plain: {plain:.2f}s, checkpointed: {checkpointed:.2f}s, "
+          f"overhead {overhead:+.1%} (target < 1%: {verdict})")
+    # Output (numbers vary):
+    # plain: 0.53s, checkpointed: 0.59s, overhead +10.7% (target < 1%: NOT met)
+    # Per item the layer adds one chain step and one islice step, about 12 ns together.
+    # CountUp.__next__ is itself a Python call of about 110 ns, so the ratio is ~10% here.
+    # (The earlier list-per-block version measured +35% with the same best-of-5 method.)
+
+    # Laziness: the first item of a slow stream arrives at once, not after 'every' items
+    class SlowCountUp(CountUp):
+        def __next__(self):
+            time.sleep(0.001)
+            return super().__next__()
+
+    start = time.perf_counter()
+    next(iter(Checkpointer(SlowCountUp(100_000), path, every=10_000)))
+    print(f"first item after {(time.perf_counter() - start) * 1000:.0f}ms")  # first item after 1ms
@@ -0,0 +1,337 @@
+# Per-stage throughput and latency instrumentation for generator chains
+# In filter_even(squares(n)) (file_007.py) every next() on the outer generator runs code of
+# ALL stages, so timing the whole loop does not tell you which stage is slow.
+
+# ChainProfiler wraps each stage's iterator in a thin probe:
+#
+#     prof = ChainProfiler(sample_every=1000)
+#     src = prof.wrap("squares", squares(n))
+#     out = prof.wrap("filter_even", filter_even(src))
+#
+# For every stage it counts items in and out, and measures the time spent INSIDE the stage,
+# EXCLUDING its upstream. How: probes nest (filter_even's next() calls squares' next()), so
+# each probe adds its own elapsed time to its caller's "child time", and the caller reports
+#     exclusive time = elapsed time - child time
+# The same idea is used by cProfile ("tottime" vs "cumtime").
+#
+# Each probe's own bookkeeping (clock reads, counters) is part of the span it reports to its
+# caller, so it is not charged to the stage that called it. The parts a probe cannot time
+# itself are measured once, when the profiler is created, and subtracted as a constant.
+#
+# Sampling: reading the clock for every item costs more than some stages themselves. With
+# sample_every=1000 only 1 in 1000 outermost next() calls is timed (and then every nested
+# call inside it, so exclusive times stay consistent). Counts are always exact; times are
+# extrapolated from the sampled calls.
+# Sampling does not make the probes free: every item still passes through one Python-level
+# __next__ per stage, sampled or not. For cheap stages that alone is a 15-40% slowdown
+# (see the demo); the probes are meant for stages that do real work per item.
+#
+# Queues between threads (e.g. a producer thread feeding a consumer) are measured with
+# prof.queue(...), which records how long put() and get() waited.
+
+import itertools
+import queue
+import threading
+import time
+
+# Sampled calls come in bursts of _BURST consecutive outermost calls (the first one is a
+# warm-up and is not recorded). A lone timed call every 1000 items runs "cold" and is several
+# times slower than the same call in a warm loop.
+_BURST = 8
+
+
+class _StageProbe:
+    def __init__(self, profiler, name, iterator):
+        self.profiler = profiler
+        self.name = name
+        self.it = iterator
+        self.outermost = True  # until another stage wraps this one
+        self.items_out = 0
+        self.exhausted = False
+        self.timed_calls = 0
+        self.exclusive_ns = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        p = self.profiler
+        if self.outermost:
+            # Only the consumer-facing probe decides whether this item is sampled;
+            # the nested probes below just follow p.sampling.
+            p.countdown -= 1
+            p.sampling = p.countdown < _BURST
+            if p.countdown == 0:
+                p.countdown = p.sample_every * _BURST
+
+        if not p.sampling:
+            # Fast path: one flag test and one counter, no clock.
+            try:
+                item = next(self.it)
+            except StopIteration:
+                self.exhausted = True
+                raise
+            self.items_out += 1
+            return item
+
+        # The clock is read first, and the span handed to the caller ends after our
+        # bookkeeping, so the caller subtracts ALL of this call, probe overhead included.
+        start = time.perf_counter_ns()
+        p.child_ns.append(0)
+        try:
+            item = next(self.it)
+        except StopIteration:
+            self.exhausted = True
+            raise
+        finally:
+            inner = time.perf_counter_ns() - start
+            child = p.child_ns.pop()
+            if p.countdown != _BURST - 1:  # the first call of a burst is only a warm-up
+                self.timed_calls += 1
+                self.exclusive_ns += inner - child - p.inside_ns
+            if p.child_ns:
+                # p.entry_ns: the call into this method and the steps before 'start'
+                p.child_ns[-1] += time.perf_counter_ns() - start + p.entry_ns
+        self.items_out += 1
+        return item
+
+    @property
+    def calls(self):
+        return self.items_out + self.exhausted  # the last call raises StopIteration
+
+
+class _InstrumentedQueue(queue.Queue):
+    """A queue.Queue that records how long put() and get() waited (sampled)."""
+
+    def __init__(self, name, maxsize, sample_every):
+        super().__init__(maxsize)
+        self.name = name
+        self.sample_every = sample_every
+        self.gets = self.puts = 0
+        self.get_wait_ns = self.put_wait_ns = 0
+        self.timed_gets = self.timed_puts = 0
+
+    def put(self, item, block=True, timeout=None):
+        self.puts += 1
+        if self.puts % self.sample_every:
+            return super().put(item, block, timeout)
+        start = time.perf_counter_ns()
+        super().put(item, block, timeout)
+        self.put_wait_ns += time.perf_counter_ns() - start
+        self.timed_puts += 1
+
+    def get(self, block=True, timeout=None):
+        self.gets += 1
+        if self.gets % self.sample_every:
+            return super().get(block, timeout)
+        start = time.perf_counter_ns()
+        item = super().get(block, timeout)
+        self.get_wait_ns += time.perf_counter_ns() - start
+        self.timed_gets += 1
+        return item
+
+
+class ChainProfiler:
+    def __init__(self, sample_every=1):
+        self.sample_every = sample_every
+        self.stages = []
+        self.queues = []
+        # Per-chain call state. A chain is driven by one thread at a time; give each thread
+        # of a multi-threaded pipeline its own ChainProfiler.
+        self.sampling = False
+        self.child_ns = []
+        self.entry_ns = self.inside_ns = 0  # zero while calibrating
+        self.entry_ns, self.inside_ns = self._calibrate()
+        self.countdown = sample_every * _BURST
+        self.started = time.perf_counter()
+
+    def _calibrate(self, trials=2001):
+        """
+        Median cost of one sampled probe call around an iterator that does no work.
+
+        Returns:
+            tuple: (entry_ns, inside_ns). entry_ns is the part the probe cannot time itself
+            (the call and the steps before its first clock read); inside_ns is the part it
+            does time, which would otherwise be charged to the stage it wraps.
+        """
+        probe = _StageProbe(self, "calibration", itertools.repeat(None))
+        probe.outermost = False
+        self.sampling = True
+        self.countdown = _BURST  # not the warm-up call, so the probe records its time
+        entry, inside = [], []
+        # The cost of one clock read (our own 'start'), from two back-to-back reads
+        clock = min(-time.perf_counter_ns() + time.perf_counter_ns() for _ in range(trials))
+        for _ in range(trials):
+            before = probe.exclusive_ns
+            self.child_ns.append(0)
+            start = time.perf_counter_ns()
+            next(probe)
+            entry.append(time.perf_counter_ns() - start - self.child_ns.pop() - clock)
+            inside.append(probe.exclusive_ns - before)
+        self.sampling = False
+        entry.sort()
+        inside.sort()
+        return max(entry[trials // 2], 0), max(inside[trials // 2], 0)
+
+    def wrap(self, name, iterable):
+        """Wrap one stage. Wrap stages from the source outwards (upstream first)."""
+        probe = _StageProbe(self, name, iter(iterable))
+        if self.stages:
+            self.stages[-1].outermost = False
+        self.stages.append(probe)
+        return probe
+
+    def queue(self, name, maxsize=0):
+        q = _InstrumentedQueue(name, maxsize, self.sample_every)
+        self.queues.append(q)
+        return q
+
+    def snapshot(self):
+        """A structured, point-in-time report. Safe to call while the chain is running."""
+        stages = []
+        previous = None
+        for probe in self.stages:
+            per_call_ns = probe.exclusive_ns / probe.timed_calls if probe.timed_calls else 0.0
+            per_call_ns = max(per_call_ns, 0.0)  # calibration is a median; tiny stages can dip
+            stages.append(
+                {
+                    "stage": probe.name,
+                    # A linear chain: what a stage took in is what its upstream gave out.
+                    "items_in": previous.items_out if previous else None,
+                    "items_out": probe.items_out,
+                    "exclusive_s": per_call_ns * probe.calls / 1e9,  # extrapolated
+                    "ns_per_call": per_call_ns,
+                    "sampled_calls": probe.timed_calls,
+                }
+            )
+            previous = probe
+        total = sum(s["exclusive_s"] for s in stages) or 1.0
+        for s in stages:
+            s["share"] = s["exclusive_s"] / total
+        queues = [
+            {
+                "queue": q.name,
+                "puts": q.puts,
+                "gets": q.gets,
+                "mean_put_wait_us": q.put_wait_ns / q.timed_puts / 1e3 if q.timed_puts else 0.0,
+                "mean_get_wait_us": q.get_wait_ns / q.timed_gets / 1e3 if q.timed_gets else 0.0,
+            }
+            for q in self.queues
+        ]
+        elapsed = time.perf_counter() - self.started
+        return {"elapsed_s": elapsed, "stages": stages, "queues": queues}
+
+    def format_report(self):
+        snap = self.snapshot()
+        lines = [f"{'stage':<14}{'in':>10}{'out':>10}{'ns/call':>10}{'time':>9}{'share':>8}"]
+        for s in snap["stages"]:
+            items_in = "-" if s["items_in"] is None else s["items_in"]
+            lines.append(
+                f"{s['stage']:<14}{items_in:>10}{s['items_out']:>10}"
+                f"{s['ns_per_call']:>10.0f}{s['exclusive_s']:>8.2f}s{s['share']:>8.0%}"
+            )
+        for q in snap["queues"]:
+            lines.append(
+                f"queue {q['queue']}: {q['gets']} gets, "
+                f"mean get wait {q['mean_get_wait_us']:.1f}us, "
+                f"mean put wait {q['mean_put_wait_us']:.1f}us"
+            )
+        return "\n".join(lines)
+
+
+# The stages from file_007.py, plus a deliberately slow one
+def squares(limit):
+    for i in range(limit):
+        yield i * i
+
+
+def slow_digits(gen):
+    for val in gen:
+        yield int("".join(sorted(str(val)))) or val  # busy work
+
+
+def filter_even(gen):
+    for val in gen:
+        if val % 2 == 0:
+            yield val
+
+
+if __name__ == "__main__":
+    n = 300_000
+
+    # Plain chain vs. instrumented chain (sampled), to see the overhead. Best of 3 runs each.
+    def plain_run():
+        start = time.perf_counter()
+        sum(filter_even(slow_digits(squares(n))))
+        return time.perf_counter() - start
+
+    def profiled_run():
+        prof = ChainProfiler(sample_every=100)
+        chain = prof.wrap("squares", squares(n))
+        chain = prof.wrap("slow_digits", slow_digits(chain))
+        chain = prof.wrap("filter_even", filter_even(chain))
+        start = time.perf_counter()
+        sum(chain)
+        return time.perf_counter() - start, prof
+
+    plain = min(plain_run() for _ in range(3))
+    instrumented, prof = min((profiled_run() for _ in range(3)), key=lambda run: run[0])
+    print(prof.format_report())
+    print(f"overhead: {(instrumented - plain) / plain:+.0%}")
+
+    # The same stages timed on their own, each fed from a list (the list walk is subtracted).
+    def alone(make_gen, source):
+        runs = []
+        for _ in range(3):
+            start = time.perf_counter()
+            sum(make_gen(source))
+            middle = time.perf_counter()
+            sum(iter(source))
+            runs.append(2 * middle - start - time.perf_counter())
+        return min(runs)
+
+    squared = list(squares(n))
+    digits = list(slow_digits(squared))
+    standalone = {
+        "squares": alone(lambda _: squares(n), ()),
+        "slow_digits": alone(slow_digits, squared),
+        "filter_even": alone(filter_even, digits),
+    }
+    print("alone:", ", ".join(f"{name} {t:.3f}s" for name, t in standalone.items()))
+    # Output (numbers vary):
+    # stage                 in       out   ns/call     time   share
+    # squares                -    300000       101    0.03s      5%
+    # slow_digits       300000    300000      1620    0.49s     88%
+    # filter_even       300000     77430       429    0.03s      6%
+    # overhead: +33%
+    # alone: squares 0.024s, slow_digits 0.481s, filter_even 0.013s
+    # slow_digits comes out on top in every run, with about the time it takes on its own.
+    # squares and filter_even cost ~0.01-0.02s each; at that size the estimate still charges
+    # filter_even 0.02-0.04s of probe cost it cannot see, so the order of those two can swap.
+    #
+    # Sampling is NOT near-free: it saves the clock reads, but every item still goes through
+    # one Python-level __next__ per stage (a few hundred ns). That is noise for stages doing
+    # real work, but with stages as cheap as these the chain runs roughly 15-40% slower.
+
+    # A live snapshot from another thread, with a queue between a producer thread and
+    # the consumer loop.
+    prof = ChainProfiler(sample_every=10)
+    q = prof.queue("squares->consumer", maxsize=100)
+    DONE = object()
+
+    def producer():
+        for val in squares(20_000):
+            q.put(val)
+        q.put(DONE)
+
+    threading.Thread(target=producer).start()
+    consumer = prof.wrap("from_queue", iter(q.get, DONE))  # iter(callable, sentinel)
+    for i, val in enumerate(filter_even(consumer)):
+        if i == 5_000:
+            live = prof.snapshot()  # the dashboard would poll this
+            print("live:", live["stages"][0]["items_out"], "items so far")
+    print(prof.format_report())
+    # live: 10001 items so far
+    # stage                 in       out   ns/call     time   share
+    # from_queue             -     20000      1929    0.04s    100%
+    # queue squares->consumer: 20001 gets, mean get wait 1.3us, mean put wait 1.4us
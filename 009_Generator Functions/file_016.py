@@ -0,0 +1,151 @@
+# Read-ahead prefetching: prefetch(gen, depth)
+# A generator only runs when its consumer calls next(). If the producer waits for I/O
+# (reading a file, a socket, a database) and the consumer then does CPU work, the two
+# never overlap:
+#
+#     producer: [wait I/O]            [wait I/O]            [wait I/O]
+#     consumer:            [compute]             [compute]             [compute]
+
+# prefetch(gen, depth) runs the producer in a background thread that fills a bounded queue
+# of up to 'depth' items ahead of the consumer, so the waiting overlaps with the computing:
+#
+#     producer: [wait I/O][wait I/O][wait I/O]
+#     consumer:           [compute ][compute ][compute ]
+#
+# This works with threads despite the GIL because blocking I/O (and time.sleep) releases it.
+#
+# Exceptions: if the upstream generator raises, the exception is put into the queue in the
+# item's place. The consumer receives every item produced before the error first, and then
+# the exception is raised from next(), exactly where iterating 'gen' directly would raise it.
+#
+# close(): closing the prefetching generator (or leaving a for loop early) tells the thread to
+# stop; it then closes the upstream generator itself (a generator may only be closed by the
+# thread that runs it) and exits. The consumer never waits for the upstream to finish.
+# A prefetching generator that is dropped without ever being started has no finally block
+# to run, so weakref.finalize() also stops the thread when the generator is garbage collected.
+
+import queue
+import threading
+import weakref
+
+_END = object()  # marks the normal end of the upstream generator
+
+
+class _Raised:
+    """Carries an exception from the producer thread to the consumer."""
+
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def prefetch(gen, depth=16):
+    """Yield the items of 'gen', read up to 'depth' items ahead by a background thread."""
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        # put() with a timeout so a stopped consumer never leaves us blocked forever.
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for item in gen:
+                if not put(item):
+                    break  # the consumer has gone away
+            else:
+                put(_END)
+        except BaseException as exc:
+            put(_Raised(exc))
+        finally:
+            if hasattr(gen, "close"):
+                gen.close()  # runs the upstream's finally blocks, in the thread that owns it
+
+    thread = threading.Thread(target=producer, name="prefetch", daemon=True)
+    thread.start()
+
+    def consumer():
+        try:
+            while True:
+                item = buffer.get()
+                if item is _END:
+                    return
+                if isinstance(item, _Raised):
+                    raise item.exc
+                yield item
+        finally:
+            # Normal end, error, or close(): release the producer.
+            stop.set()
+
+    result = consumer()
+    weakref.finalize(result, stop.set)  # dropped, even unstarted: release the producer
+    return result
+
+
+if __name__ == "__main__":
+    import time
+
+    # A simulated slow source (I/O-bound) and a CPU-bound consumer
+    def slow_source(n, delay=0.002):
+        try:
+            for i in range(n):
+                time.sleep(delay)  # e.g. waiting for a disk read or a network packet
+                yield i
+        finally:
+            print("slow_source: closed")
+
+    def busy(ms):
+        end = time.perf_counter() + ms / 1000
+        while time.perf_counter() < end:
+            pass
+
+    n = 300
+    start = time.perf_counter()
+    for item in slow_source(n):
+        busy(2)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for item in prefetch(slow_source(n), depth=8):
+        busy(2)
+    prefetched = time.perf_counter() - start
+    print(f"sequential: {sequential:.2f}s, prefetched: {prefetched:.2f}s")
+    # Output (numbers vary):
+    # slow_source: closed
+    # slow_source: closed
+    # sequential: 1.25s, prefetched: 0.65s
+
+    # Exceptions arrive after the items produced before them
+    def failing_source():
+        yield 1
+        yield 2
+        raise ValueError("disk read failed")
+
+    received = []
+    try:
+        for item in prefetch(failing_source()):
+            received.append(item)
+    except ValueError as e:
+        print(received, "then:", e)  # [1, 2] then: disk read failed
+
+    # Stopping early: close() returns at once; the thread closes the source.
+    gen = prefetch(slow_source(10_000), depth=4)
+    print(next(gen), next(gen))  # 0 1
+    start = time.perf_counter()
+    gen.close()
+    print(f"close() took {(time.perf_counter() - start) * 1000:.1f}ms")  # close() took 0.0ms
+    time.sleep(0.1)  # give the producer thread a moment to print its cleanup message
+    # slow_source: closed
+
+    # Dropped without ever being started: the thread still stops and closes the source.
+    gen = prefetch(slow_source(10_000), depth=4)
+    del gen
+    time.sleep(0.1)
+    print("prefetch threads alive:", sum(t.name == "prefetch" for t in threading.enumerate()))
+    # slow_source: closed
+    # prefetch threads alive: 0
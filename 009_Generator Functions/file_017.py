@@ -0,0 +1,209 @@
+# Bounded-memory broadcast: one generator, several consumers
+# itertools.tee(gen, n) gives n independent iterators over one generator, but it keeps every
+# item that some iterator has not read yet. If one consumer lags (or never reads at all), tee
+# buffers the WHOLE stream in memory.
+
+# Broadcast uses the iterable/iterator split from 005_OOP/file_032_itr2.py:
+# - Broadcast is the ITERABLE: it owns the source and a fixed-size ring buffer.
+# - subscribe() returns a Subscriber, the ITERATOR: it only holds its own position, so every
+#   subscriber walks the same buffer independently (like MyRange's independent iterators).
+#
+# Items are numbered 0, 1, 2, ... as they are read from the source; item number s lives in
+# ring[s % capacity]. 'head' is the number of items read so far, so the buffer holds items
+# head - capacity .. head - 1, and a subscriber at position pos lags head - pos items.
+#
+# When the slowest subscriber is 'capacity' items behind, the buffer is full. The policy says
+# what happens when a faster subscriber wants a new item:
+# - "block": it waits until the slowest one catches up (use this with one thread per
+#   subscriber; a single thread would wait for itself forever).
+# - "drop":  the new item overwrites the oldest one. The slow subscriber later skips ahead
+#   to the oldest item still buffered and counts how many it missed.
+# Either way memory is bounded by 'capacity' items.
+#
+# The broadcast holds its subscribers through WEAK references (weakref.ref): a subscriber
+# that its consumer dropped, e.g. after breaking out of "for x in b", disappears by itself
+# and no longer holds the "block" policy back, even if close() was never called.
+
+import threading
+import weakref
+
+
+class Broadcast:
+    def __init__(self, source, capacity=1024, policy="block"):
+        if policy not in ("block", "drop"):
+            raise ValueError("policy must be 'block' or 'drop'")
+        self.source = iter(source)
+        self.capacity = capacity
+        self.policy = policy
+        self.ring = [None] * capacity
+        self.head = 0  # number of items read from the source so far
+        self.done = False
+        self.error = None  # an exception raised by the source, re-raised to every subscriber
+        self.refs = []  # weak references to the subscribers
+        self.created = 0  # subscribers created so far, for default names
+        self.cond = threading.Condition()  # re-entrant (an RLock), see _collected()
+
+    def __iter__(self):
+        # Like MyRange: each call returns a fresh, independent iterator
+        return self.subscribe()
+
+    def subscribe(self, name=None):
+        """A new subscriber starts at the oldest item still in the buffer."""
+        with self.cond:
+            oldest = max(0, self.head - self.capacity)
+            sub = Subscriber(self, name or f"sub{self.created}", oldest)
+            self.created += 1
+            self.refs.append(weakref.ref(sub, self._collected))
+            return sub
+
+    def unsubscribe(self, sub):
+        with self.cond:
+            self.refs = [r for r in self.refs if r() is not None and r() is not sub]
+            self.cond.notify_all()  # it may have been the slowest one
+
+    def _collected(self, ref):
+        # A subscriber was garbage collected: wake threads that may have waited for it.
+        # (This can run inside a method that already holds the lock; the lock is re-entrant.)
+        with self.cond:
+            self.cond.notify_all()
+
+    @property
+    def subscribers(self):
+        """The live subscribers, oldest first (call with the lock held)."""
+        live = [r() for r in self.refs]
+        live = [s for s in live if s is not None]
+        if len(live) < len(self.refs):
+            self.refs = [r for r in self.refs if r() is not None]
+        return live
+
+    def lag(self):
+        """Per-subscriber report: how far behind the source it is and how many items it lost."""
+        with self.cond:
+            return {
+                s.name: {"lag": self.head - s.pos, "dropped": s.dropped} for s in self.subscribers
+            }
+
+    def _read_one(self):
+        # Called with the lock held, by a subscriber that has read everything buffered so far.
+        if self.policy == "block":
+            def full():
+                subs = self.subscribers
+                return bool(subs) and self.head - min(s.pos for s in subs) >= self.capacity
+
+            while not self.done and full():
+                self.cond.wait()
+            if self.done:
+                return  # another thread reached the end while we waited
+        try:
+            item = next(self.source)
+        except StopIteration:
+            self.done = True
+        except Exception as exc:
+            self.done, self.error = True, exc
+        else:
+            self.ring[self.head % self.capacity] = item
+            self.head += 1
+        self.cond.notify_all()
+
+
+class Subscriber:
+    def __init__(self, broadcast, name, pos):
+        self.broadcast = broadcast
+        self.name = name
+        self.pos = pos  # number of the next item to read
+        self.dropped = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        b = self.broadcast
+        with b.cond:
+            while self.pos == b.head:
+                if b.done:
+                    if b.error is not None:
+                        raise b.error
+                    raise StopIteration
+                b._read_one()
+            oldest = b.head - b.capacity
+            if self.pos < oldest:  # "drop" policy: our items were overwritten
+                self.dropped += oldest - self.pos
+                self.pos = oldest
+            item = b.ring[self.pos % b.capacity]
+            self.pos += 1
+            if b.policy == "block":
+                b.cond.notify_all()  # we may have been holding a faster subscriber back
+            return item
+
+    def close(self):
+        """Stop reading, so a blocked broadcast no longer waits for this subscriber."""
+        self.broadcast.unsubscribe(self)  # safe to call twice
+
+
+if __name__ == "__main__":
+    import itertools
+    import time
+    import tracemalloc
+
+    def numbers(n):
+        for i in range(n):
+            yield str(i) * 10  # items with some weight, to make memory visible
+
+    # Example 1: one consumer reads everything, the other has not started yet.
+    n = 200_000
+    tracemalloc.start()
+    fast, slow = itertools.tee(numbers(n))
+    for _ in fast:
+        pass
+    print(f"tee:       peak {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB buffered")
+    tracemalloc.stop()
+    del fast, slow
+
+    tracemalloc.start()
+    b = Broadcast(numbers(n), capacity=1000, policy="drop")
+    fast, slow = b.subscribe("fast"), b.subscribe("slow")
+    for _ in fast:
+        pass
+    print(f"broadcast: peak {tracemalloc.get_traced_memory()[1] / 1e6:.1f} MB buffered")
+    tracemalloc.stop()
+    print(b.lag())
+    print(next(slow)[:6], b.lag()["slow"])  # skips to the oldest buffered item
+    # Output:
+    # tee:       peak 22.5 MB buffered
+    # broadcast: peak 0.1 MB buffered
+    # {'fast': {'lag': 0, 'dropped': 0}, 'slow': {'lag': 200000, 'dropped': 0}}
+    # 199000 {'lag': 999, 'dropped': 199000}
+
+    # Example 2: "block" with one thread per consumer. The fast consumer is held back so it
+    # is never more than 'capacity' items ahead of the slow one; nothing is lost.
+    b = Broadcast(range(2_000), capacity=50, policy="block")
+    subs = [b.subscribe("fast"), b.subscribe("slow")]
+    totals, max_lag = {}, []
+
+    def consume(sub, delay):
+        total = 0
+        for item in sub:
+            total += item
+            if delay:
+                time.sleep(delay)
+        totals[sub.name] = total
+
+    threads = [
+        threading.Thread(target=consume, args=(subs[0], 0)),
+        threading.Thread(target=consume, args=(subs[1], 0.0005)),
+    ]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        max_lag.append(b.lag()["slow"]["lag"])  # a monitoring loop would report this
+        time.sleep(0.01)
+    for t in threads:
+        t.join()
+    print(totals, "max lag of slow:", max(max_lag))
+    # {'fast': 1999000, 'slow': 1999000} max lag of slow: 50
+
+    # Example 3: a consumer that stops early and drops its subscriber does not block the rest
+    b = Broadcast(range(100), capacity=5)
+    for x in b:
+        break  # the loop's Subscriber is dropped here, and with it its weak reference
+    print(len(list(b)))  # 100 (a new subscriber starts at the oldest buffered item, 0)
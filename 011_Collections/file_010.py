@@ -0,0 +1,254 @@
+# DenseCounter: a Counter for small integer keys, stored as a count vector
+# Counter(words) (file_001.py) hashes every element and looks it up in a dict. When the keys
+# are small integers anyway (IDs 0..N-1, bucket numbers, byte values, category codes), a dict
+# is more than we need: the key can be used directly as a POSITION in an array of counts.
+#
+#     keys:    3 1 3 0 3          counts[0] counts[1] counts[2] counts[3]
+#                          ->         1         1         0         3
+#
+# DenseCounter(size) keeps counts for keys 0 .. size-1 in one vector:
+# - with NumPy, update(keys) is np.bincount(keys): the whole input is counted by one C loop;
+# - without NumPy, the counts live in an array("q") and update() first counts the input with
+#   Counter (also C), then adds one number per DISTINCT key into the vector.
+# Keys outside 0 .. size-1 (or that are not integers) go to a regular Counter, 'overflow', so
+# every input is accepted. Anything operator.index() accepts is an integer here: True counts
+# as 1 and np.int64(3) as 3, just as they hit the same dict entry in a Counter.
+#
+# Arithmetic follows Counter (file_002.py, file_003.py):
+#   c1 + c2, c1 - c2, c1 & c2 (min), c1 | c2 (max) -> a new DenseCounter that keeps only
+#                                                     positive counts
+#   c.subtract(other)                              -> in place; counts may go negative
+# On vectors each operator is one element-wise pass instead of a loop over dict keys.
+
+import heapq
+import itertools
+import operator
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the counts fall back to array.array
+    np = None
+
+
+class DenseCounter:
+    def __init__(self, size, iterable=None, backend=None, **kwds):
+        if backend is None:
+            backend = "numpy" if np is not None else "array"
+        if backend == "numpy" and np is None:
+            raise ImportError("backend='numpy' but NumPy is not installed")
+        if backend not in ("numpy", "array"):
+            raise ValueError(f"unknown backend: {backend!r}")
+        self.size = size
+        self.backend = backend
+        if backend == "numpy":
+            self.counts = np.zeros(size, dtype=np.int64)
+        else:
+            self.counts = array("q", bytes(8 * size))
+        self.overflow = Counter()  # keys outside 0 .. size-1
+        self.update(iterable, **kwds)
+
+    def _new(self):
+        return DenseCounter(self.size, backend=self.backend)
+
+    def _slot(self, key):
+        """The position of 'key' in the vector, or None when it belongs in 'overflow'."""
+        try:
+            index = operator.index(key)  # also True and NumPy integers, which equal an int
+        except TypeError:
+            return None
+        return index if 0 <= index < self.size else None
+
+    # Counting
+    def update(self, iterable=None, /, **kwds):
+        self._add(iterable, 1)
+        if kwds:
+            self._add(kwds, 1)
+
+    def subtract(self, iterable=None, /, **kwds):
+        self._add(iterable, -1)
+        if kwds:
+            self._add(kwds, -1)
+
+    def _add(self, iterable, sign):
+        if iterable is None:
+            return
+        if isinstance(iterable, DenseCounter):
+            self._check(iterable)
+            if self.backend == "numpy":
+                self.counts += sign * iterable.counts
+            else:
+                op = operator.add if sign > 0 else operator.sub
+                self.counts = array("q", map(op, self.counts, iterable.counts))
+            self._add(iterable.overflow, sign)
+            return
+        if hasattr(iterable, "items"):
+            # A mapping of counts: one step per key
+            for key, count in iterable.items():
+                index = self._slot(key)
+                if index is None:
+                    self.overflow[key] += sign * count
+                else:
+                    self.counts[index] += sign * count
+            return
+        if self.backend == "numpy":
+            keys = np.asarray(iterable)
+            if keys.dtype.kind in "iu":  # an integer array: count it with bincount
+                keys = keys.ravel()
+                inside = (keys >= 0) & (keys < self.size)
+                self.counts += sign * np.bincount(keys[inside], minlength=self.size)
+                outside = keys[~inside]
+                if len(outside):
+                    self._add(Counter(outside.tolist()), sign)
+                return
+        # Any other iterable: count in C first, then one step per distinct key
+        self._add(Counter(iterable), sign)
+
+    # Reading
+    def __getitem__(self, key):
+        index = self._slot(key)
+        if index is None:
+            return self.overflow[key]
+        return int(self.counts[index])
+
+    def items(self):
+        """(key, count) for every key with a non-zero count."""
+        if self.backend == "numpy":
+            keys = np.flatnonzero(self.counts)
+            dense = zip(keys.tolist(), self.counts[keys].tolist())
+        else:
+            dense = ((k, c) for k, c in enumerate(self.counts) if c)
+        return list(itertools.chain(dense, ((k, c) for k, c in self.overflow.items() if c)))
+
+    def total(self):
+        return int(sum(self.counts)) + self.overflow.total()
+
+    def most_common(self, n=None):
+        if n is None:
+            return sorted(self.items(), key=operator.itemgetter(1), reverse=True)
+        if self.backend == "numpy" and 0 < n < self.size:
+            # argpartition finds the n largest positions without sorting the whole vector
+            top = np.argpartition(self.counts, -n)[-n:]
+            dense = [(k, c) for k, c in zip(top.tolist(), self.counts[top].tolist()) if c]
+        else:
+            dense = heapq.nlargest(n, ((k, c) for k, c in enumerate(self.counts) if c),
+                                   key=operator.itemgetter(1))
+        candidates = dense + self.overflow.most_common(n)
+        return heapq.nlargest(n, candidates, key=operator.itemgetter(1))
+
+    def to_counter(self):
+        return Counter(dict(self.items()))
+
+    # Arithmetic, with the same semantics as Counter
+    def _check(self, other):
+        if not isinstance(other, DenseCounter):
+            raise TypeError("expected a DenseCounter")
+        if other.size != self.size:
+            raise ValueError("DenseCounters must have the same size")
+
+    def _binary(self, other, vector_op, counter_op):
+        self._check(other)
+        result = self._new()
+        if self.backend == "numpy" and other.backend == "numpy":
+            result.counts = np.maximum(vector_op(self.counts, other.counts), 0)
+        else:
+            combined = map(vector_op, self.counts, other.counts)
+            result.counts = array("q", map(max, combined, itertools.repeat(0)))
+        # Counter's own operators already keep only positive counts (of the result, not the
+        # inputs: a negative count left by subtract() takes part, as in the vector above)
+        result.overflow = counter_op(self.overflow, other.overflow)
+        return result
+
+    def __add__(self, other):
+        return self._binary(other, operator.add, operator.add)
+
+    def __sub__(self, other):
+        return self._binary(other, operator.sub, operator.sub)
+
+    def __and__(self, other):
+        vector_min = np.minimum if self.backend == "numpy" else min
+        return self._binary(other, vector_min, operator.and_)
+
+    def __or__(self, other):
+        vector_max = np.maximum if self.backend == "numpy" else max
+        return self._binary(other, vector_max, operator.or_)
+
+    def __eq__(self, other):
+        if not isinstance(other, DenseCounter):
+            return NotImplemented
+        return self.to_counter() == other.to_counter()
+
+    def __repr__(self):
+        return f"DenseCounter({dict(self.most_common())})"
+
+
+# The examples from file_002.py and file_003.py, with integer keys (a=0, b=1, c=2, d=3)
+c1 = DenseCounter(4, {0: 3, 1: 1, 2: 2})
+c2 = DenseCounter(4, {0: 1, 1: 2, 3: 4})
+print(c1 + c2)  # DenseCounter({0: 4, 3: 4, 1: 3, 2: 2})
+print(c1 - c2)  # DenseCounter({0: 2, 2: 2})
+print(c1 & c2)  # DenseCounter({0: 1, 1: 1})
+print(c1 | c2)  # DenseCounter({3: 4, 0: 3, 1: 2, 2: 2})
+plain1, plain2 = c1.to_counter(), c2.to_counter()
+assert (c1 + c2).to_counter() == plain1 + plain2 and (c1 - c2).to_counter() == plain1 - plain2
+assert (c1 & c2).to_counter() == plain1 & plain2 and (c1 | c2).to_counter() == plain1 | plain2
+
+cnt1 = DenseCounter(4, {0: 4, 1: 2, 2: 1})
+cnt1.subtract({0: 1, 1: 3, 3: 2})
+print(cnt1.items())  # [(0, 3), (1, -1), (2, 1), (3, -2)]
+
+# Negative counts behave the same for in-range and overflow keys (and as in Counter)
+a, b = DenseCounter(4, {0: 3, 99: 3}), DenseCounter(4, {0: 0, 99: 0})
+b.subtract({0: 1, 99: 1})
+plain_a, plain_b = a.to_counter(), b.to_counter()
+assert (a + b).to_counter() == plain_a + plain_b == Counter({0: 2, 99: 2})
+assert (a - b).to_counter() == plain_a - plain_b == Counter({0: 4, 99: 4})
+assert (a & b).to_counter() == plain_a & plain_b and (a | b).to_counter() == plain_a | plain_b
+
+# Out-of-range keys fall back to a dict
+ids = DenseCounter(10, [1, 3, 3, 42, -1, "x", 3])
+print(ids[3], ids[42], ids["x"], ids.most_common(2))  # 3 1 1 [(3, 3), (1, 1)]
+
+# True == 1, so like Counter it shares key 1's slot
+flags = DenseCounter(4, [1])
+flags.update({True: 1})
+assert flags[1] == flags[True] == (Counter([1]) + Counter({True: 1}))[1] == 2
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # Benchmark: counting 5,000,000 IDs drawn from 0..999
+    random.seed(7)
+    keys = array("q", random.choices(range(1000), k=5_000_000))
+    as_list = keys.tolist()
+
+    def timed(label, func):
+        start = time.perf_counter()
+        result = func()
+        print(f"{label:<37}{time.perf_counter() - start:.3f}s")
+        return result
+
+    exact = timed("Counter(list)", lambda: Counter(as_list))
+    dense = timed("DenseCounter(array backend)", lambda: DenseCounter(1000, keys, "array"))
+    if np is not None:
+        np_keys = np.frombuffer(keys, dtype=np.int64)
+        timed("DenseCounter(numpy, bincount)", lambda: DenseCounter(1000, np_keys, "numpy"))
+    print(dense.to_counter() == exact)
+
+    # Arithmetic between two counters with 1000 keys, repeated 1000 times
+    other_exact, other_dense = Counter(exact), DenseCounter(1000, exact, "array")
+    timed("Counter + Counter (x1000)", lambda: [exact + other_exact for _ in range(1000)])
+    timed("DenseCounter + DenseCounter (x1000)", lambda: [dense + other_dense for _ in range(1000)])
+    # Output (numbers vary; measured without NumPy installed):
+    # Counter(list)                        0.466s
+    # DenseCounter(array backend)          0.599s
+    # True
+    # Counter + Counter (x1000)            0.520s
+    # DenseCounter + DenseCounter (x1000)  0.344s
+    # Without NumPy, counting is done by Counter anyway, so the array backend pays a little
+    # extra to copy the result into the vector; its gain is in the arithmetic (and in memory:
+    # 8 bytes per key). With NumPy, np.bincount counts the same 5M keys several times faster
+    # than Counter, because no Python int is ever created for the input.
@@ -0,0 +1,146 @@
+# Map-reduce counting: Counter arithmetic across a process pool
+# Counting the words of hundreds of files with one Counter runs on one core. But counting is
+# easy to split, because Counters can be ADDED (file_003.py):
+#
+#     Counter(words_of_file_1) + Counter(words_of_file_2) == Counter(words_of_both_files)
+#
+# count_tokens_parallel() uses this in three phases:
+# 1. map:    the files are split into shards; each worker process counts its shard into its
+#            own Counter. No locks, no shared state.
+# 2. reduce: the per-worker Counters are added in PAIRS, also in the pool, round after round:
+#                c1 c2 c3 c4 c5      round 1: c1+c2, c3+c4, c5
+#                                    round 2: c12+c34, c5
+#                                    round 3: c1234+c5
+#            a "tree reduction": log2(workers) rounds, and each round's merges run in parallel,
+#            instead of one process adding every Counter one after another.
+# 3. decode: the final result is turned back into a Counter in the main process.
+#
+# Moving Counters between processes: pickle writes a type tag and a length for every key and
+# every count (about 15 bytes per entry for short words). encode_counter() sends a Counter as
+# two blocks instead: all keys joined into one string, and all counts as one array("q"), the
+# whole thing zlib-compressed. That is about a third of the size, at the same speed.
+#
+# Each phase is timed, so you can see where the time goes.
+
+import concurrent.futures
+import os
+import time
+import zlib
+from array import array
+from collections import Counter
+
+
+def encode_counter(counter):
+    """Compact bytes for a Counter of str keys without newlines (e.g. tokens from split())."""
+    keys = "\n".join(counter.keys()).encode()
+    counts = array("q", counter.values()).tobytes()
+    return zlib.compress(len(keys).to_bytes(8, "little") + keys + counts, level=1)
+
+
+def decode_counter(blob):
+    data = zlib.decompress(blob)
+    size = int.from_bytes(data[:8], "little")
+    keys = data[8 : 8 + size].decode().split("\n") if size else []
+    counts = array("q")
+    counts.frombytes(data[8 + size :])
+    return Counter(dict(zip(keys, counts)))
+
+
+def _count_files(paths):
+    """Map phase, in a worker: count the tokens of a few files."""
+    counter = Counter()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                counter.update(line.split())
+    return encode_counter(counter)
+
+
+def _merge_pair(blobs):
+    """Reduce phase, in a worker: add two encoded Counters."""
+    if len(blobs) == 1:
+        return blobs[0]
+    return encode_counter(decode_counter(blobs[0]) + decode_counter(blobs[1]))
+
+
+def count_tokens_parallel(paths, workers=None, shards=None):
+    """Return (Counter of all whitespace-separated tokens in 'paths', timings per phase)."""
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    timings = {}
+    groups = [paths[i::shards] for i in range(shards) if paths[i::shards]]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        blobs = list(pool.map(_count_files, groups))
+        timings["map"] = time.perf_counter() - start
+        timings["bytes sent"] = sum(len(b) for b in blobs)
+
+        start = time.perf_counter()
+        rounds = 0
+        while len(blobs) > 1:
+            pairs = [blobs[i : i + 2] for i in range(0, len(blobs), 2)]
+            blobs = list(pool.map(_merge_pair, pairs))
+            rounds += 1
+        timings["reduce"] = time.perf_counter() - start
+        timings["reduce rounds"] = rounds
+
+    start = time.perf_counter()
+    result = decode_counter(blobs[0]) if blobs else Counter()
+    timings["decode"] = time.perf_counter() - start
+    return result, timings
+
+
+if __name__ == "__main__":
+    import pickle
+    import random
+    import tempfile
+
+    # Test data: 200 text files of random "words"
+    random.seed(1)
+    vocabulary = [f"word{i}" for i in range(200_000)]
+    folder = tempfile.mkdtemp()
+    paths = []
+    for i in range(200):
+        path = os.path.join(folder, f"doc{i}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(100):
+                f.write(" ".join(random.choices(vocabulary, k=100)) + "\n")
+        paths.append(path)
+
+    start = time.perf_counter()
+    serial = Counter()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                serial.update(line.split())
+    print(f"one process: {time.perf_counter() - start:.2f}s, {len(serial)} distinct tokens")
+
+    start = time.perf_counter()
+    parallel, timings = count_tokens_parallel(paths, workers=4)
+    print(f"process pool: {time.perf_counter() - start:.2f}s, same result: {parallel == serial}")
+    for phase, value in timings.items():
+        print(f"  {phase:<14}{value:.2f}s" if isinstance(value, float) else f"  {phase:<14}{value}")
+
+    # Compact serialisation vs. pickle, for the final Counter
+    start = time.perf_counter()
+    pickled = pickle.dumps(serial)
+    pickle_time = time.perf_counter() - start
+    start = time.perf_counter()
+    compact = encode_counter(serial)
+    compact_time = time.perf_counter() - start
+    print(f"pickle: {len(pickled) / 1e6:.1f} MB in {pickle_time:.3f}s, "
+          f"encode_counter: {len(compact) / 1e6:.1f} MB in {compact_time:.3f}s")
+    # Output (numbers vary with the number of CPU cores):
+    # one process: 1.24s, 199990 distinct tokens
+    # process pool: 3.66s, same result: True
+    #   map           1.57s
+    #   bytes sent    3354830
+    #   reduce        1.92s
+    #   reduce rounds 2
+    #   decode        0.12s
+    # pickle: 2.9 MB in 0.059s, encode_counter: 1.0 MB in 0.053s
+    # (measured on a 1-CPU machine: the 4 workers take turns, so the pool only adds process
+    #  start-up and serialisation costs. With 4 free cores the map phase runs ~4x faster and
+    #  each reduce round's merges run side by side. The timings show which phase to tune:
+    #  here it is the reduce phase, since adding Counters with ~150,000 keys each is a
+    #  Python-level loop inside Counter.__add__.)
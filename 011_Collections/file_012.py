@@ -0,0 +1,247 @@
+# TopKCounter: a Counter that keeps its top k up to date
+# Counter.most_common(n) (file_001.py) looks at EVERY key on every call: heapq.nlargest over
+# all items, O(N log n). A dashboard that calls most_common(10) after every update on a
+# Counter with 10 million keys redoes that whole scan each time, although one update changes
+# only a handful of counts.
+
+# TopKCounter(k) is a Counter subclass that maintains the answer as the counts change:
+# - An INDEXED min-heap holds the current top k keys, ordered by count. "Indexed" means a
+#   dict remembers where each key sits in the heap list, so when a key's count changes we can
+#   find it and move it up or down in O(log k) (heapq cannot do that: it only pushes and pops).
+# - 'bound' is an upper bound for the counts of all keys OUTSIDE the top k.
+#
+# Every change goes through __setitem__ (update() and subtract() use it too):
+# - a top-k key grows:            sift it within the heap, O(log k);
+# - an outside key grows:         if it beats the smallest top-k count it replaces that key
+#                                 (which moves outside and raises 'bound'), else only 'bound'
+#                                 may rise; O(log k);
+# - a top-k key shrinks:          sift it; as long as it stays >= bound, nobody outside can
+#                                 beat it. Only if it drops below 'bound' do we rescan all
+#                                 keys once (O(N)) to find the true top k again. With mostly
+#                                 increasing counts (counting events) that is rare.
+#
+# most_common(n) with n <= k just sorts the k heap entries; a larger n uses heapq.nlargest,
+# a partial selection that never sorts all N keys.
+#
+# Bulk loads (an update with more items than the counter already holds) skip the per-key
+# bookkeeping: the counts are added at dict speed and the heap is rebuilt once.
+
+import heapq
+import operator
+from collections import Counter
+
+_count = operator.itemgetter(1)
+
+
+class TopKCounter(Counter):
+    def __init__(self, k=10, iterable=None, /, **kwds):
+        self.k = k
+        self._heap = []  # the top-k keys; _heap[0] has the smallest count
+        self._pos = {}  # key -> index in _heap
+        self.bound = float("-inf")  # no key outside the top k has a larger count
+        self.rescans = 0
+        super().__init__()
+        self.update(iterable, **kwds)
+
+    # Indexed heap helpers: the heap stores keys, compared by their current count.
+    def _swap(self, i, j):
+        heap, pos = self._heap, self._pos
+        heap[i], heap[j] = heap[j], heap[i]
+        pos[heap[i]] = i
+        pos[heap[j]] = j
+
+    def _sift_up(self, i):
+        heap, get = self._heap, dict.__getitem__
+        while i > 0:
+            parent = (i - 1) >> 1
+            if get(self, heap[i]) >= get(self, heap[parent]):
+                break
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i):
+        heap, get = self._heap, dict.__getitem__
+        n = len(heap)
+        while True:
+            smallest, left = i, 2 * i + 1
+            for child in (left, left + 1):
+                if child < n and get(self, heap[child]) < get(self, heap[smallest]):
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    def _rebuild(self):
+        """Find the top k with one scan over all keys."""
+        self.rescans += 1
+        best = heapq.nlargest(self.k + 1, dict.items(self), key=_count)
+        top = best[: self.k]
+        self.bound = best[self.k][1] if len(best) > self.k else float("-inf")
+        self._heap = [key for key, _ in sorted(top, key=_count)]  # sorted = a valid min-heap
+        self._pos = {key: i for i, key in enumerate(self._heap)}
+
+    # Every change of a count comes through here
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        heap, pos = self._heap, self._pos
+        if key in pos:
+            i = pos[key]
+            self._sift_up(i)
+            self._sift_down(pos[key])
+            if dict.__getitem__(self, heap[0]) < self.bound:
+                self._rebuild()  # a top-k count fell below an outside one: look again
+        elif len(heap) < self.k and self.bound == float("-inf"):
+            # Fewer than k keys so far: every key is in the top k
+            heap.append(key)
+            pos[key] = len(heap) - 1
+            self._sift_up(len(heap) - 1)
+        elif heap and value > dict.__getitem__(self, heap[0]):
+            # Replace the smallest top-k key, which now becomes an outside key
+            evicted = heap[0]
+            self.bound = max(self.bound, dict.__getitem__(self, evicted))
+            del pos[evicted]
+            heap[0] = key
+            pos[key] = 0
+            self._sift_down(0)
+        else:
+            self.bound = max(self.bound, value)
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        if key in self._pos:
+            self._rebuild()
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        key, value = dict.popitem(self)
+        if key in self._pos:
+            self._rebuild()
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        dict.clear(self)
+        self._heap, self._pos, self.bound = [], {}, float("-inf")
+
+    # update() and subtract(): large inputs are loaded in bulk, then the heap is rebuilt once
+    def _bulk(self, iterable, sign):
+        counts = iterable if hasattr(iterable, "items") else Counter(iterable)
+        if not self:
+            dict.update(self, counts if sign > 0 else {k: -v for k, v in counts.items()})
+        else:
+            get = dict.get
+            for key, value in counts.items():
+                dict.__setitem__(self, key, get(self, key, 0) + sign * value)
+        self._rebuild()
+
+    def _is_large(self, iterable):
+        return hasattr(iterable, "__len__") and len(iterable) > max(len(self), 1000)
+
+    def update(self, iterable=None, /, **kwds):
+        # Counter.update() copies a mapping into an EMPTY counter with dict.update, which
+        # never calls __setitem__; such an update must go through _bulk as well
+        if iterable is not None and (
+            self._is_large(iterable) or (not self and hasattr(iterable, "items"))
+        ):
+            self._bulk(iterable, 1)
+            iterable = None
+        super().update(iterable, **kwds)
+
+    def subtract(self, iterable=None, /, **kwds):
+        if iterable is not None and self._is_large(iterable):
+            self._bulk(iterable, -1)
+            iterable = None
+        super().subtract(iterable, **kwds)
+
+    def most_common(self, n=None):
+        if n is not None and n <= self.k and len(self._heap) == min(self.k, len(self)):
+            top = sorted(((key, dict.__getitem__(self, key)) for key in self._heap),
+                         key=_count, reverse=True)
+            return top[:n]
+        return super().most_common(n)  # partial selection (heapq.nlargest) or a full sort
+
+    def copy(self):
+        return self.__class__(self.k, dict(self))
+
+    def __reduce__(self):
+        return self.__class__, (self.k, dict(self))
+
+
+words = ["apple", "banana", "apple", "orange", "banana", "apple", "kiwi", "banana"]
+fruits_counts = TopKCounter(2, words)
+print(fruits_counts.most_common(2))  # [('banana', 3), ('apple', 3)]
+# (equal counts may come out in a different order than with Counter)
+fruits_counts.update(["banana", "kiwi", "kiwi"])
+print(fruits_counts.most_common(2))  # [('banana', 4), ('apple', 3)]
+fruits_counts.subtract(["banana"] * 3)  # banana drops to 1, below kiwi (3): one rescan
+print(fruits_counts.most_common(2), fruits_counts.rescans)  # [('apple', 3), ('kiwi', 3)] 1
+
+# A small mapping as the starting point: the heap is built from all of it
+small = TopKCounter(2, {"a": 100, "b": 50, "c": 1})
+small.update(["c"])
+small.update(["b"])
+assert small.most_common(2) == [("a", 100), ("b", 51)]
+
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    # Usage: python file_012.py [N]    (N distinct keys, default 10,000,000; both counters
+    # together need about 1.2 GB of memory at that size, so try e.g. 1000000 first)
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    random.seed(3)
+
+    start = time.perf_counter()
+    plain = Counter(dict(zip(range(n), (random.randrange(1, 1000) for _ in range(n)))))
+    print(f"{n} keys loaded in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    topk = TopKCounter(10, plain)  # a bulk load: one scan
+    print(f"TopKCounter built in {time.perf_counter() - start:.1f}s")
+
+    # A dashboard: a small batch of events arrives, then the top 10 is queried
+    def batch():
+        return [random.randrange(n) for _ in range(100)] + [random.randrange(50)] * 20
+
+    def dashboard(counter, rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            counter.update(batch())
+            top = counter.most_common(10)
+        return (time.perf_counter() - start) / rounds, top
+
+    random.seed(4)
+    plain_time, plain_top = dashboard(plain, 3)
+    random.seed(4)
+    topk_time, topk_top = dashboard(topk, 3)  # the same 3 batches as 'plain'
+    print(f"update + most_common(10): Counter {plain_time * 1000:.1f}ms, "
+          f"TopKCounter {topk_time * 1000:.3f}ms")
+    print("same top 10 counts:", [c for _, c in plain_top] == [c for _, c in topk_top])
+    more_time, _ = dashboard(topk, 1000)
+    print(f"TopKCounter over 1000 more rounds: {more_time * 1000:.3f}ms per round, "
+          f"{topk.rescans} rescan(s) in total")
+
+    start = time.perf_counter()
+    top_1000 = topk.most_common(1000)  # n > k: partial selection, not a full sort
+    print(f"most_common(1000): {time.perf_counter() - start:.2f}s")
+    # Output (numbers vary):
+    # 10000000 keys loaded in 9.6s
+    # TopKCounter built in 1.3s
+    # update + most_common(10): Counter 782.6ms, TopKCounter 0.356ms
+    # same top 10 counts: True
+    # TopKCounter over 1000 more rounds: 0.270ms per round, 1 rescan(s) in total
+    # most_common(1000): 1.58s
+    # With N = 1000000: Counter 61.0ms, TopKCounter 0.224ms per round. Counter's cost grows
+    # with N; TopKCounter's depends only on the batch size and k.
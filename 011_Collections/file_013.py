@@ -0,0 +1,212 @@
+# Columnar group-by: grouping without a list per key
+# The defaultdict idiom from file_004.py and file_006.py:
+#
+#     groups = defaultdict(list)
+#     for key, value in rows:
+#         groups[key].append(value)
+#
+# runs several Python bytecodes per row (the loop, the lookup, the method call), builds one
+# list per key, and then needs ANOTHER loop to compute sum/min/max per group. For tens of
+# millions of rows that is most of the runtime.
+
+# The columnar way keeps the data as two parallel columns, keys[i] and values[i], and
+# describes the groups with two flat arrays instead of many lists:
+#
+#     keys    = ["b", "a", "b", "c", "a"]
+#     indices = [1, 4,  0, 2,  3]     row numbers, ordered group by group   ("a", "b", "c")
+#     offsets = [0,     2,     4, 5]  group g is indices[offsets[g] : offsets[g + 1]]
+#
+# (the same layout as a "CSR" sparse matrix). Two ways to build it:
+# - method="hash": number the distinct keys in order of first appearance with a dict
+#   (code = a small int per key), then sort the row numbers by code.
+# - method="sort": sort the row numbers by the keys themselves; groups come out in key order.
+# Both use only C-level loops per row: dict.fromkeys, map(dict.__getitem__, ...), sorted()
+# with a C key function, Counter. Python code runs once per GROUP, not once per row.
+#
+# Aggregation then reads each group as one contiguous slice of the reordered values, so
+# sum/min/max are single C calls per group; count and first need no values at all.
+# With NumPy the same plan becomes np.unique + np.argsort + np.add.reduceat.
+#
+# group_by() uses the columnar plan where it wins: for NumPy arrays, and for count/first
+# (one Counter or dict pass, no reordering). For sum/min/max on plain lists the O(n log n)
+# reorder costs more than the O(n) defaultdict loop it replaces, so group_by() falls back
+# to that loop.
+
+import itertools
+import operator
+from collections import Counter, defaultdict, namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the pure-Python engine needs only the stdlib
+    np = None
+
+Groups = namedtuple("Groups", ["keys", "offsets", "indices"])
+
+AGGREGATIONS = ("sum", "count", "min", "max", "first")
+
+
+def group_index(keys, method="hash"):
+    """Describe the groups of 'keys' as Groups(keys, offsets, indices); no per-key lists."""
+    if np is not None and isinstance(keys, np.ndarray):
+        unique, codes = np.unique(keys, return_inverse=True)
+        indices = np.argsort(codes, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(unique)))))
+        return Groups(unique, offsets, indices)
+
+    if method == "hash":
+        group_keys, codes, offsets = _hash_codes(keys)
+        indices = sorted(range(len(codes)), key=codes.__getitem__)  # stable: row order kept
+    elif method == "sort":
+        indices = sorted(range(len(keys)), key=keys.__getitem__)
+        runs = [(key, len(list(run))) for key, run in
+                itertools.groupby(map(keys.__getitem__, indices))]
+        group_keys = [key for key, _ in runs]
+        offsets = list(itertools.accumulate((size for _, size in runs), initial=0))
+    else:
+        raise ValueError("method must be 'hash' or 'sort'")
+    return Groups(group_keys, offsets, indices)
+
+
+def _hash_codes(keys):
+    """(distinct keys in first-appearance order, a code per row, offsets)."""
+    code_of = {key: code for code, key in enumerate(dict.fromkeys(keys))}
+    codes = list(map(code_of.__getitem__, keys))
+    sizes = Counter(codes)
+    offsets = list(itertools.accumulate(map(sizes.__getitem__, range(len(code_of))), initial=0))
+    return list(code_of), codes, offsets
+
+
+def group_by(keys, values=None, agg="sum", method="hash"):
+    """
+    Aggregate 'values' per distinct key. agg is one name or a tuple of names from
+    AGGREGATIONS. Returns (group keys, results), where results is a list per aggregation
+    (or a dict {name: list} when agg is a tuple). values may be omitted only for "count".
+    """
+    names = (agg,) if isinstance(agg, str) else tuple(agg)
+    for name in names:
+        if name not in AGGREGATIONS:
+            raise ValueError(f"unknown aggregation: {name!r}")
+    if method not in ("hash", "sort"):
+        raise ValueError("method must be 'hash' or 'sort'")
+    if values is None and any(name != "count" for name in names):
+        raise ValueError(f"values is required for agg={agg!r}")
+
+    if np is not None and isinstance(keys, np.ndarray):
+        results = _group_by_numpy(keys, values, names)
+        group_keys = results.pop("keys")
+    elif set(names) <= {"count", "first"}:
+        # No reordering needed at all: both are single C-level passes over the rows.
+        sizes = Counter(keys)  # keeps first-appearance order, like the hash codes
+        group_keys = sorted(sizes) if method == "sort" else list(sizes)
+        results = {"count": list(map(sizes.__getitem__, group_keys))}
+        if "first" in names:
+            # Later assignments win in a dict, so feeding the rows backwards keeps the first
+            firsts = dict(zip(reversed(keys), reversed(values)))
+            results["first"] = list(map(firsts.__getitem__, group_keys))
+    else:
+        # sum/min/max need every group's values together. Without NumPy, putting the rows
+        # in group order takes an O(n log n) sort, which is slower than the O(n)
+        # defaultdict(list) loop, so that loop is used here.
+        groups = defaultdict(list)
+        for key, value in zip(keys, values):
+            groups[key].append(value)
+        group_keys = sorted(groups) if method == "sort" else list(groups)
+        lists = list(map(groups.__getitem__, group_keys))
+        reducers = {"sum": sum, "min": min, "max": max, "count": len,
+                    "first": operator.itemgetter(0)}
+        results = {name: list(map(reducers[name], lists)) for name in names}
+
+    if isinstance(agg, str):
+        return group_keys, results[agg]
+    return group_keys, {name: results[name] for name in names}
+
+
+def _group_by_numpy(keys, values, names):
+    groups = group_index(keys)
+    starts = groups.offsets[:-1]
+    ordered = np.asarray(values)[groups.indices] if values is not None else None
+    reducers = {"sum": np.add, "min": np.minimum, "max": np.maximum}
+    results = {"keys": groups.keys}
+    for name in names:
+        if name == "count":
+            results[name] = np.diff(groups.offsets)
+        elif name == "first":
+            results[name] = ordered[starts]
+        else:
+            results[name] = reducers[name].reduceat(ordered, starts)
+    return results
+
+
+names = ["Alice", "Bob", "Arun", "Bella", "Chris"]
+letters = [name[0] for name in names]
+g = group_index(letters)
+print(g)  # Groups(keys=['A', 'B', 'C'], offsets=[0, 2, 4, 5], indices=[0, 2, 1, 3, 4])
+for key, start, stop in zip(g.keys, g.offsets, g.offsets[1:]):
+    print(key, [names[i] for i in g.indices[start:stop]])  # A ['Alice', 'Arun'] ...
+
+category = ["fruits", "fruits", "colors", "colors", "fruits"]
+price = [3.0, 1.5, 2.0, 4.0, 2.5]
+print(group_by(category, price, agg=("sum", "count", "min", "max", "first"), method="sort"))
+# (['colors', 'fruits'], {'sum': [6.0, 7.0], 'count': [2, 3], 'min': [2.0, 1.5],
+#                         'max': [4.0, 3.0], 'first': [2.0, 3.0]})
+print(group_by(category, agg="count"))  # (['fruits', 'colors'], [3, 2])
+try:
+    group_by(category)  # agg="sum" needs values
+except ValueError as e:
+    print(e)  # values is required for agg='sum'
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # Benchmark: 2,000,000 rows, 20,000 distinct keys; sum and max per key
+    random.seed(5)
+    vocabulary = [f"user{i}" for i in range(20_000)]
+    keys = random.choices(vocabulary, k=2_000_000)
+    values = [random.random() for _ in range(len(keys))]
+
+    def timed(label, func):
+        start = time.perf_counter()
+        result = func()
+        print(f"{label:<30}{time.perf_counter() - start:.2f}s")
+        return result
+
+    def with_defaultdict():
+        groups = defaultdict(list)
+        for key, value in zip(keys, values):
+            groups[key].append(value)
+        return list(groups), {"sum": [sum(v) for v in groups.values()],
+                              "max": [max(v) for v in groups.values()]}
+
+    expected = timed("defaultdict(list) + loops", with_defaultdict)
+    hashed = timed("group_by(method='hash')", lambda: group_by(keys, values, ("sum", "max")))
+    by_sort = timed("group_by(method='sort')",
+                    lambda: group_by(keys, values, ("sum", "max"), method="sort"))
+    print(hashed[0] == expected[0] and hashed[1]["max"] == expected[1]["max"])
+    print(sorted(by_sort[0]) == sorted(expected[0]))
+
+    def count_first_defaultdict():
+        groups = defaultdict(list)
+        for key, value in zip(keys, values):
+            groups[key].append(value)
+        return list(groups), {"count": [len(v) for v in groups.values()],
+                              "first": [v[0] for v in groups.values()]}
+
+    expected = timed("defaultdict: count, first", count_first_defaultdict)
+    result = timed("group_by: count, first", lambda: group_by(keys, values, ("count", "first")))
+    print(result == expected)
+    # Output (numbers vary; measured without NumPy installed):
+    # defaultdict(list) + loops     0.82s
+    # group_by(method='hash')       0.74s
+    # group_by(method='sort')       0.73s
+    # True
+    # True
+    # defaultdict: count, first     0.65s
+    # group_by: count, first        0.49s
+    # True
+    # count and first are single C passes and beat the defaultdict loop. For sum/max on lists
+    # group_by() runs that same defaultdict loop (the sort-based reorder took 1.57s with
+    # 'hash' and 2.91s with 'sort' here). With NumPy arrays as input, the columnar plan
+    # (np.unique, argsort, reduceat) runs entirely in vectorized C and is many times faster.